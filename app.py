@@ -1,4 +1,19 @@
+import argparse
+
+from engine.puzzle_bank import LEVELS, parse_difficulty_range
+from engine.puzzle_format import parse_box_size
 from gui.sudoku_board import SudokuBoard
 
 if __name__ == "__main__":
-    SudokuBoard().start()
+    parser = argparse.ArgumentParser(description="Play sudoku.")
+    parser.add_argument('-b', '--box', type=parse_box_size, default=(3, 3),
+                        help="box size as RxC, e.g. 4x4 for 16x16 boards (default: 3x3)")
+    parser.add_argument('-j', '--solve-processes', type=int, default=None,
+                        help="split each solve over this many processes")
+    parser.add_argument('-c', '--cache', default=None, help="solution cache file, reused across runs")
+    parser.add_argument('--bank', default=None, help="puzzle bank to draw new puzzles from instead of generating")
+    parser.add_argument('-d', '--difficulty', type=parse_difficulty_range, default=(0, LEVELS - 1),
+                        help="difficulty levels of bank puzzles as MIN-MAX, e.g. 4-8 (default: all)")
+    args = parser.parse_args()
+    SudokuBoard(*args.box, cache_path=args.cache, bank_path=args.bank, bank_difficulty=args.difficulty,
+                solve_processes=args.solve_processes).start()
@@ -0,0 +1,142 @@
+import argparse
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+
+from engine.engines import ENGINES, create_solver
+from engine.puzzle_format import parse_puzzle, format_puzzle, parse_box_size
+from engine.search_stats import SearchStats
+from engine.solver import Solver
+from engine.validation import validate_grids
+
+VERDICTS = {
+    Solver.UNSOLVABLE: 'unsolvable',
+    Solver.NOT_UNIQUE: 'not unique',
+}
+
+solver = None
+slow_threshold = None
+
+
+def init_worker(engine, row_group_size, column_group_size, slow=None):
+    global solver, slow_threshold
+    solver = create_solver(engine, row_group_size, column_group_size)
+    slow_threshold = slow
+
+
+def solve_line(line):
+    try:
+        grid = parse_puzzle(line, solver.size)
+    except ValueError:
+        return 'invalid', None
+    status, solution = solver.solve(grid)
+    # Stats travel back only for slow puzzles, to keep the results small
+    stats = solver.last_stats
+    slow = stats.as_dict() if slow_threshold is not None and stats.elapsed >= slow_threshold else None
+    if status == Solver.SOLVED:
+        return format_puzzle(solution), slow
+    return VERDICTS[status], slow
+
+
+def read_puzzles(stream):
+    for line in stream:
+        if line.strip() and not line.startswith('#'):
+            yield line
+
+
+def run(source, target, processes, chunk_size, engine='backtracking', row_group_size=3, column_group_size=3,
+        progress=0, slow=None):
+    puzzles = read_puzzles(source)
+    window_size = chunk_size * processes * 4
+    solved = 0
+    start = time.perf_counter()
+    with Pool(processes, initializer=init_worker,
+              initargs=(engine, row_group_size, column_group_size, slow)) as pool:
+        while True:
+            window = list(islice(puzzles, window_size))
+            if not window:
+                break
+            for line, (result, stats) in zip(window, pool.imap(solve_line, window, chunksize=chunk_size)):
+                target.write(result + '\n')
+                if stats is not None:
+                    print("slow puzzle {}: {}".format(line.strip(), '; '.join(SearchStats.describe(stats))),
+                          file=sys.stderr)
+                solved += 1
+                if progress and solved % progress == 0:
+                    report(solved, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    report(solved, elapsed)
+    return solved, elapsed
+
+
+def validate(source, target, chunk_size, row_group_size=3, column_group_size=3, progress=0):
+    size = row_group_size * column_group_size
+    puzzles = read_puzzles(source)
+    checked = 0
+    start = time.perf_counter()
+    while True:
+        window = list(islice(puzzles, chunk_size))
+        if not window:
+            break
+        grids = np.zeros((len(window), size, size), dtype=np.uint8)
+        parsed = np.zeros(len(window), dtype=bool)
+        for i, line in enumerate(window):
+            try:
+                grids[i] = parse_puzzle(line, size)
+                parsed[i] = True
+            except ValueError:
+                pass
+        valid, _ = validate_grids(grids, row_group_size, column_group_size)
+        target.writelines('valid\n' if verdict else 'invalid\n' for verdict in valid & parsed)
+        checked += len(window)
+        if progress and checked % progress < len(window):
+            report(checked, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    report(checked, elapsed)
+    return checked, elapsed
+
+
+def report(solved, elapsed):
+    rate = solved / elapsed if elapsed > 0 else 0.0
+    print("{} puzzles in {:.2f} s ({:.1f} puzzles/s)".format(solved, elapsed, rate), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve puzzles given one per line, one symbol per cell.")
+    parser.add_argument('input', nargs='?', default='-', help="puzzle file, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="solution file, '-' for stdout")
+    parser.add_argument('-j', '--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('-c', '--chunk-size', type=int, default=64, help="puzzles sent to a worker at once")
+    parser.add_argument('--validate', action='store_true', help="check complete grids instead of solving puzzles")
+    parser.add_argument('-e', '--engine', choices=sorted(ENGINES), default='backtracking', help="search engine")
+    parser.add_argument('-p', '--progress', type=int, default=0, help="report throughput every N puzzles")
+    parser.add_argument('-s', '--slow', type=float, default=None,
+                        help="report search stats of puzzles taking at least this many ms")
+    parser.add_argument('-b', '--box', type=parse_box_size, default=(3, 3), help="box size as RxC (default: 3x3)")
+    args = parser.parse_args(argv)
+
+    processes = args.processes
+    if processes is None:
+        from os import cpu_count
+        processes = cpu_count() or 1
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.validate:
+            validate(source, target, args.chunk_size * 1024, *args.box, progress=args.progress)
+        else:
+            slow = None if args.slow is None else args.slow / 1000
+            run(source, target, processes, args.chunk_size, args.engine, *args.box, progress=args.progress, slow=slow)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from engine.candidates import CandidateGrid
+from engine.checker import Checker
+from engine.engines import ENGINES, create_solver
+from engine.generator import Generator
+from engine.occupancy import Occupancy
+from engine.parallel import ParallelSolver
+from engine.puzzle_format import parse_puzzle
+from engine.transforms import GridFactory
+from engine.validation import validate_grids
+
+# Well-known hard puzzles, every one checked to have a single solution when the corpora are built
+HARDEST = {
+    'arto_inkala_2012': "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    'ai_escargot': "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    'easter_monster': "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    'top95_1': "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    'top95_2': "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(latencies, nodes=None):
+    values = np.array(latencies, dtype=float)
+    total = float(values.sum())
+    summary = {'count': len(values), 'total': total, 'throughput': len(values) / total if total > 0 else None,
+               'mean': float(values.mean()), 'max': float(values.max())}
+    for percentile in PERCENTILES:
+        summary['p{}'.format(percentile)] = float(np.percentile(values, percentile))
+    if nodes is not None:
+        summary['nodes_mean'] = float(np.mean(nodes))
+        summary['nodes_max'] = int(np.max(nodes))
+    return summary
+
+
+def measure(function, items, nodes_of=None):
+    latencies, nodes = [], []
+    for item in items:
+        start = time.perf_counter()
+        function(item)
+        latencies.append(time.perf_counter() - start)
+        if nodes_of is not None:
+            nodes.append(nodes_of())
+    return summarize(latencies, nodes if nodes_of is not None else None)
+
+
+def spoil(puzzle, solution, rng):
+    # A value that clashes with no given but differs from the unique solution leaves nothing to find
+    candidate_values = CandidateGrid(puzzle)
+    cells = np.argwhere(puzzle == 0)
+    for i, j in cells[rng.permutation(len(cells))]:
+        values = [value for value in candidate_values.candidates(i, j) if value != solution[i][j]]
+        if values:
+            spoiled = puzzle.copy()
+            spoiled[i][j] = values[0]
+            return spoiled
+    raise ValueError("Puzzle has no cell to spoil")
+
+
+def build_corpora(seed, count, solver):
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    grid_factory = GridFactory(rng=rng)
+    easy_generator = Generator(grid_factory=grid_factory)
+    hard_generator = Generator(grid_factory=grid_factory, mode=Generator.DIGGING)
+
+    corpora = {'easy': [easy_generator.generate_puzzle() for _ in range(count)]}
+    hard, solutions = [], []
+    for _ in range(count):
+        solution = grid_factory.next_grid()
+        hard.append(hard_generator.generate_puzzle(solution))
+        solutions.append(solution)
+    corpora['hard'] = hard
+    corpora['hardest'] = [parse_puzzle(line) for line in HARDEST.values()]
+
+    non_unique = []
+    for puzzle in hard:
+        # Dug puzzles are minimal, so taking away any clue opens a second solution
+        puzzle = puzzle.copy()
+        clues = np.argwhere(puzzle != 0)
+        i, j = clues[rng.integers(len(clues))]
+        puzzle[i][j] = 0
+        non_unique.append(puzzle)
+    corpora['non_unique'] = non_unique
+    corpora['unsolvable'] = [spoil(puzzle, solution, rng) for puzzle, solution in zip(hard, solutions)]
+
+    expected = {'easy': 1, 'hard': 1, 'hardest': 1, 'non_unique': 2, 'unsolvable': 0}
+    for name, puzzles in corpora.items():
+        for puzzle in puzzles:
+            if solver.count_solutions(puzzle, limit=2) != expected[name]:
+                raise ValueError("Corpus '{}' holds a puzzle with an unexpected number of solutions".format(name))
+    return corpora, solutions
+
+
+def benchmark_search(corpora, engine):
+    solver = create_solver(engine, 3, 3)
+    results = {}
+    for name, puzzles in corpora.items():
+        nodes = lambda: solver.last_stats.nodes
+        results['solve/{}'.format(name)] = measure(solver.solve, puzzles, nodes)
+        results['count/{}'.format(name)] = measure(lambda puzzle: solver.count_solutions(puzzle, limit=2),
+                                                   puzzles, nodes)
+    return results
+
+
+def benchmark_parallel(corpora, processes):
+    results = {}
+    with ParallelSolver(processes=processes) as solver:
+        solver.get_pool()
+        for name in ('hard', 'hardest', 'non_unique'):
+            results['solve_parallel/{}'.format(name)] = measure(solver.solve, corpora[name],
+                                                                lambda: solver.last_stats.nodes)
+    return results
+
+
+def benchmark_generation(seed, count):
+    random.seed(seed)
+    generator = Generator()
+    dig_generator = Generator(mode=Generator.DIGGING)
+    factory_generator = Generator(grid_factory=GridFactory(rng=np.random.default_rng(seed)))
+    nodes = lambda: generator.last_stats.nodes
+    return {
+        'generate_grid/search': measure(lambda _: generator.generate_grid(), range(count), nodes),
+        'generate_grid/factory': measure(lambda _: factory_generator.generate_grid(), range(count)),
+        'generate_puzzle/random': measure(lambda _: generator.generate_puzzle(), range(count), nodes),
+        'generate_puzzle/dig': measure(lambda _: dig_generator.generate_puzzle(), range(count),
+                                       lambda: dig_generator.last_stats.nodes),
+    }
+
+
+def typing_moves(puzzles, rng):
+    # One value typed into an empty cell of each puzzle, on occupancy counters loaded as the board does
+    moves = []
+    for puzzle in puzzles:
+        cells = np.argwhere(puzzle == 0)
+        i, j = cells[rng.integers(len(cells))]
+        moves.append((Occupancy(puzzle), int(i), int(j), int(rng.integers(1, 10))))
+    return moves
+
+
+def type_and_hint(move):
+    occupancy, i, j, value = move
+    occupancy.set(i, j, value)
+    return occupancy.conflicts()
+
+
+def benchmark_checks(corpora, solutions, seed):
+    checker = Checker()
+    grids = np.array(solutions, dtype=np.uint8)
+    moves = typing_moves(corpora['hard'] + corpora['unsolvable'], np.random.default_rng(seed))
+    return {
+        'check/solution': measure(checker.check, solutions),
+        'hint/typing': measure(type_and_hint, moves),
+        'validate/batch': measure(lambda batch: validate_grids(batch, 3, 3), [grids] * 10),
+    }
+
+
+def benchmark_render(corpora, frames):
+    # Offscreen rendering, no window is needed, and no greeting from pygame in the JSON on stdout
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    import pygame
+    from gui.sudoku_board import SudokuBoard
+
+    board = SudokuBoard(idle_timeout=None)
+    board.show_puzzle(corpora['hard'][0].copy())
+    results = {'render/draw': measure(lambda _: board.draw(), range(frames))}
+    board.render()
+    empty = [tuple(cell) for cell in np.argwhere(board.grid == 0)]
+
+    def type_value(frame):
+        i, j = empty[frame % len(empty)]
+        board.set_value(i, j, frame % 9 + 1)
+        board.render()
+
+    results['render/dirty'] = measure(type_value, range(frames))
+    results['render/idle'] = measure(lambda _: board.render(), range(frames))
+    pygame.quit()
+    return results
+
+
+def compare(baseline, results, stream):
+    for name, summary in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p50'], summary['p50']
+        change = (after - before) / before * 100 if before > 0 else 0.0
+        print("{:28} p50 {:10.3f} ms -> {:10.3f} ms ({:+.1f}%)".format(name, before * 1000, after * 1000, change),
+              file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark solving, generation, checks and rendering.")
+    parser.add_argument('-o', '--output', default='-', help="JSON result file, '-' for stdout")
+    parser.add_argument('-s', '--seed', type=int, default=2024, help="seed of the generated corpora")
+    parser.add_argument('-n', '--count', type=int, default=20, help="puzzles per generated corpus")
+    parser.add_argument('-f', '--frames', type=int, default=200, help="frames per rendering benchmark")
+    parser.add_argument('-e', '--engine', choices=sorted(ENGINES), default='backtracking', help="search engine")
+    parser.add_argument('-c', '--compare', default=None, help="earlier JSON result to compare medians with")
+    parser.add_argument('-j', '--parallel', type=int, default=None,
+                        help="also solve with the parallel search over this many processes")
+    parser.add_argument('--no-render', action='store_true', help="skip the rendering benchmarks")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    corpora, solutions = build_corpora(args.seed, args.count, create_solver('backtracking', 3, 3))
+    results = {}
+    results.update(benchmark_search(corpora, args.engine))
+    if args.parallel is not None:
+        results.update(benchmark_parallel(corpora, args.parallel))
+    results.update(benchmark_generation(args.seed, args.count))
+    results.update(benchmark_checks(corpora, solutions, args.seed))
+    if not args.no_render:
+        results.update(benchmark_render(corpora, args.frames))
+
+    report = {
+        'options': {'seed': args.seed, 'count': args.count, 'frames': args.frames, 'engine': args.engine,
+                    'parallel': args.parallel},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'platform': platform.platform()},
+        'elapsed': time.perf_counter() - start,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(json.load(file)['results'], results, sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
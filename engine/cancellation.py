@@ -0,0 +1,35 @@
+import time
+
+
+class Cancelled(Exception):
+    pass
+
+
+class CancelToken:
+
+    def __init__(self, timeout=None, node_limit=None, parent=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.node_limit = node_limit
+        # Cancelling the parent cancels this token too
+        self.parent = parent
+        self.cancelled = False
+        self.timed_out = False
+        self.exhausted = False
+        # Number of checkpoints passed, used as a progress measure
+        self.progress = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        self.progress += 1
+        if self.cancelled:
+            raise Cancelled()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.timed_out = True
+            raise Cancelled()
+        if self.node_limit is not None and self.progress > self.node_limit:
+            self.exhausted = True
+            raise Cancelled()
+        if self.parent is not None:
+            self.parent.check()
@@ -0,0 +1,127 @@
+from engine.geometry import Geometry
+
+
+class CandidateGrid:
+
+    def __init__(self, grid, row_group_size=3, column_group_size=3):
+        self.geometry = Geometry.get(row_group_size, column_group_size)
+        self.size = self.geometry.size
+        self.reset(grid)
+
+    def reset(self, grid):
+        geometry = self.geometry
+        self.values = [0] * geometry.cells
+        self.row_masks = [0] * self.size
+        self.column_masks = [0] * self.size
+        self.box_masks = [0] * self.size
+        # Entries (cell, previous mask, assigned value), value 0 marks a plain elimination
+        self.trail = []
+        self.valid = True
+
+        for i in range(self.size):
+            for j in range(self.size):
+                value = int(grid[i][j])
+                if value != 0:
+                    cell = geometry.cell_index(i, j)
+                    bit = CandidateGrid.to_bit(value)
+                    box = geometry.cell_box[cell]
+                    if (self.row_masks[i] | self.column_masks[j] | self.box_masks[box]) & bit:
+                        self.valid = False
+                    self.values[cell] = value
+                    self.row_masks[i] |= bit
+                    self.column_masks[j] |= bit
+                    self.box_masks[box] |= bit
+
+        # Candidates straight from the unit masks, cheaper than assigning every given through its peers
+        full_mask = geometry.full_mask
+        self.masks = [CandidateGrid.to_bit(value) if value != 0 else
+                      full_mask & ~(self.row_masks[row] | self.column_masks[column] | self.box_masks[box])
+                      for value, row, column, box in zip(self.values, geometry.cell_row, geometry.cell_column,
+                                                         geometry.cell_box)]
+        # Cells that were left with one candidate, checked again when taken
+        self.singles = [cell for cell, mask in enumerate(self.masks)
+                        if self.values[cell] == 0 and mask & (mask - 1) == 0]
+
+    @staticmethod
+    def to_bit(value):
+        return 1 << (value - 1)
+
+    @staticmethod
+    def to_values(mask):
+        values = []
+        value = 1
+        while mask:
+            if mask & 1:
+                values.append(value)
+            mask >>= 1
+            value += 1
+        return values
+
+    def candidates(self, row, column):
+        return CandidateGrid.to_values(self.masks[self.geometry.cell_index(row, column)])
+
+    def mark(self):
+        return len(self.trail)
+
+    def assign(self, cell, value):
+        bit = CandidateGrid.to_bit(value)
+        geometry = self.geometry
+        self.trail.append((cell, self.masks[cell], value))
+        self.values[cell] = value
+        self.masks[cell] = bit
+        self.row_masks[geometry.cell_row[cell]] |= bit
+        self.column_masks[geometry.cell_column[cell]] |= bit
+        self.box_masks[geometry.cell_box[cell]] |= bit
+
+        consistent = True
+        for peer in geometry.peers[cell]:
+            mask = self.masks[peer]
+            if self.values[peer] == 0 and mask & bit:
+                self.trail.append((peer, mask, 0))
+                mask &= ~bit
+                self.masks[peer] = mask
+                if mask == 0:
+                    consistent = False
+                elif mask & (mask - 1) == 0:
+                    self.singles.append(peer)
+        return consistent
+
+    def eliminate(self, cell, mask):
+        current = self.masks[cell]
+        if current & mask:
+            self.trail.append((cell, current, 0))
+            current &= ~mask
+            self.masks[cell] = current
+            if current & (current - 1) == 0:
+                self.singles.append(cell)
+        return current != 0
+
+    def undo(self, mark):
+        geometry = self.geometry
+        while len(self.trail) > mark:
+            cell, mask, value = self.trail.pop()
+            self.masks[cell] = mask
+            if value != 0:
+                bit = ~CandidateGrid.to_bit(value)
+                self.values[cell] = 0
+                self.row_masks[geometry.cell_row[cell]] &= bit
+                self.column_masks[geometry.cell_column[cell]] &= bit
+                self.box_masks[geometry.cell_box[cell]] &= bit
+
+    def get_empty_cell(self):
+        minimum = self.size + 1
+        best = -1
+        for cell, value in enumerate(self.values):
+            if value == 0:
+                count = self.masks[cell].bit_count()
+                if count < minimum:
+                    minimum = count
+                    best = cell
+                    if minimum <= 1:
+                        return best
+        return best
+
+    def fill(self, grid):
+        for cell, value in enumerate(self.values):
+            grid[self.geometry.cell_row[cell]][self.geometry.cell_column[cell]] = value
+        return grid
@@ -0,0 +1,18 @@
+import numpy as np
+
+from engine.validation import validate_grids
+
+
+class Checker:
+
+    def __init__(self, row_group_size=3, column_group_size=3):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.size = row_group_size * column_group_size
+
+    def validate(self, grids):
+        return validate_grids(grids, self.row_group_size, self.column_group_size)
+
+    def check(self, grid):
+        valid, _ = self.validate(np.asarray(grid)[None])
+        return bool(valid[0])
@@ -0,0 +1,182 @@
+from random import shuffle
+
+import numpy as np
+
+from engine.geometry import Geometry
+from engine.solver import Solver
+
+
+class DancingLinksSolver(Solver):
+
+    def __init__(self, row_group_size=3, column_group_size=3):
+        super().__init__(row_group_size, column_group_size, propagator=False)
+        self.geometry = Geometry.get(row_group_size, column_group_size)
+        self.build()
+
+    def constraint_columns(self, cell, value):
+        # Columns of the exact-cover matrix: cell filled, then digit in row, column and box
+        size, cells, geometry = self.size, self.geometry.cells, self.geometry
+        digit = value - 1
+        return (1 + cell,
+                1 + cells + geometry.cell_row[cell] * size + digit,
+                1 + 2 * cells + geometry.cell_column[cell] * size + digit,
+                1 + 3 * cells + geometry.cell_box[cell] * size + digit)
+
+    def build(self):
+        columns = 4 * self.geometry.cells
+        # Node 0 is the root, nodes 1..columns are column headers
+        self.left = [i - 1 for i in range(columns + 1)]
+        self.right = [i + 1 for i in range(columns + 1)]
+        self.left[0], self.right[columns] = columns, 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.column_size = [0] * (columns + 1)
+        self.candidate = [None] * (columns + 1)
+        self.row_start = {}
+
+        for cell in range(self.geometry.cells):
+            for value in range(1, self.size + 1):
+                first = len(self.left)
+                for k, header in enumerate(self.constraint_columns(cell, value)):
+                    node = first + k
+                    self.left.append(first + (k - 1) % 4)
+                    self.right.append(first + (k + 1) % 4)
+                    self.up.append(self.up[header])
+                    self.down.append(header)
+                    self.down[self.up[header]] = node
+                    self.up[header] = node
+                    self.column.append(header)
+                    self.candidate.append((cell, value))
+                    self.column_size[header] += 1
+                self.row_start[(cell, value)] = first
+
+    def cover(self, header):
+        left, right, up, down, column, column_size = \
+            self.left, self.right, self.up, self.down, self.column, self.column_size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                column_size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header):
+        left, right, up, down, column, column_size = \
+            self.left, self.right, self.up, self.down, self.column, self.column_size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                column_size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def select(self, node):
+        self.cover(self.column[node])
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def deselect(self, node):
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+        self.uncover(self.column[node])
+
+    def search(self, limit, solutions, chosen, randomize=False, token=None):
+        if token is not None:
+            token.check()
+        stats = self.stats
+        stats.nodes += 1
+        if len(chosen) > stats.max_depth:
+            stats.max_depth = len(chosen)
+        right, down, column_size = self.right, self.down, self.column_size
+        if right[0] == 0:
+            if solutions is not None:
+                solutions.append(list(chosen))
+            return 1
+        # Choose the column with fewest rows left
+        header = right[0]
+        best, minimum = header, column_size[header]
+        while header != 0 and minimum > 1:
+            if column_size[header] < minimum:
+                best, minimum = header, column_size[header]
+            header = right[header]
+        if minimum == 0:
+            return 0
+
+        rows = []
+        node = down[best]
+        while node != best:
+            rows.append(node)
+            node = down[node]
+        if randomize:
+            shuffle(rows)
+
+        count = 0
+        for node in rows:
+            chosen.append(self.candidate[node])
+            self.select(node)
+            found = self.search(limit - count, solutions, chosen, randomize, token)
+            self.deselect(node)
+            chosen.pop()
+            if found == 0:
+                stats.backtracks += 1
+            count += found
+            if count >= limit:
+                break
+        return count
+
+    def run(self, grid, limit, solutions=None, randomize=False, token=None, stats=None):
+        stats = self.start_stats(stats)
+        givens = []
+        used = set()
+        values = np.asarray(grid).reshape(-1)
+        with stats.phase('setup'):
+            for cell, value in enumerate(values):
+                if value != 0:
+                    columns = self.constraint_columns(cell, int(value))
+                    if used.intersection(columns):
+                        stats.finish()
+                        return 0
+                    used.update(columns)
+                    givens.append(self.row_start[(cell, int(value))])
+            for node in givens:
+                self.select(node)
+        try:
+            with stats.phase('search'):
+                count = self.search(limit, solutions, [], randomize, token)
+        except BaseException:
+            # An interrupted search leaves rows covered, start over from a fresh matrix
+            self.build()
+            raise
+        for node in reversed(givens):
+            self.deselect(node)
+        stats.finish()
+        return count
+
+    def find_solutions(self, grid, limit=2, randomize=False, token=None, stats=None):
+        chosen_lists = []
+        self.run(grid, limit, chosen_lists, randomize, token, stats)
+        solutions = []
+        for chosen in chosen_lists:
+            solution = np.array(grid, dtype=int).reshape(-1)
+            for cell, value in chosen:
+                solution[cell] = value
+            solutions.append(solution.reshape(self.size, self.size))
+        return solutions
+
+    def count_solutions(self, grid, limit=2, token=None, stats=None):
+        return self.run(grid, limit, token=token, stats=stats)
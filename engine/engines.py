@@ -0,0 +1,33 @@
+import time
+
+from engine.dlx import DancingLinksSolver
+from engine.solver import Solver
+
+ENGINES = {
+    'backtracking': Solver,
+    'dlx': DancingLinksSolver,
+}
+
+
+def create_solver(name='backtracking', row_group_size=3, column_group_size=3):
+    if name not in ENGINES:
+        raise ValueError("Unknown engine '{}', expected one of: {}".format(name, ', '.join(ENGINES)))
+    return ENGINES[name](row_group_size, column_group_size)
+
+
+def compare_engines(grids, names=tuple(ENGINES), row_group_size=3, column_group_size=3):
+    solvers = {name: create_solver(name, row_group_size, column_group_size) for name in names}
+    report = {name: {'total': 0.0, 'worst': 0.0} for name in names}
+    mismatches = []
+    for index, grid in enumerate(grids):
+        verdicts = {}
+        for name, solver in solvers.items():
+            start = time.perf_counter()
+            status, solution = solver.solve(grid)
+            elapsed = time.perf_counter() - start
+            report[name]['total'] += elapsed
+            report[name]['worst'] = max(report[name]['worst'], elapsed)
+            verdicts[name] = (status, None if solution is None else solution.tobytes())
+        if len(set(verdicts.values())) > 1:
+            mismatches.append(index)
+    return report, mismatches
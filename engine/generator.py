@@ -0,0 +1,161 @@
+import time
+from random import randrange, shuffle
+
+import numpy as np
+
+from engine.cancellation import CancelToken, Cancelled
+from engine.candidates import CandidateGrid
+from engine.search_stats import SearchStats
+from engine.solver import Solver
+
+
+class Generator:
+    RANDOM_REMOVAL = 'random'
+    DIGGING = 'dig'
+
+    NO_SYMMETRY = 'none'
+    ROTATIONAL = 'rotational'
+    MIRROR = 'mirror'
+
+    def __init__(self, row_group_size=3, column_group_size=3, remove_attempts=5, grid_factory=None,
+                 mode=RANDOM_REMOVAL, symmetry=NO_SYMMETRY, target_clues=None, test_budget=None):
+        self.solver = Solver(row_group_size, column_group_size)
+        self.size = self.solver.size
+        self.remove_attempts = remove_attempts
+        self.grid_factory = grid_factory
+        self.mode = mode
+        self.symmetry = symmetry
+        self.target_clues = target_clues
+        # Search nodes allowed for one uniqueness test when digging, a clue stays when it runs out
+        self.test_budget = test_budget
+        self.last_report = None
+        self.hooks = []
+        self.last_stats = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def start_stats(self, stats=None):
+        self.last_stats = SearchStats(self.hooks) if stats is None else stats
+        return self.last_stats
+
+    def generate_grid(self, token=None, stats=None):
+        stats = self.start_stats(stats)
+        if self.grid_factory is not None:
+            with stats.phase('transform'):
+                grid = self.grid_factory.next_grid()
+            stats.finish()
+            return grid
+        row_group_size, column_group_size = self.solver.row_group_size, self.solver.column_group_size
+        while True:
+            grid = np.zeros(shape=(self.size, self.size), dtype=int)
+            with stats.phase('seed'):
+                # Boxes on the diagonal share no row or column; 3x3 fillings always complete, smaller boxes may not
+                for k in range(min(self.size // row_group_size, self.size // column_group_size)):
+                    values = list(range(1, self.size + 1))
+                    shuffle(values)
+                    grid[k * row_group_size:(k + 1) * row_group_size,
+                         k * column_group_size:(k + 1) * column_group_size] = \
+                        np.array(values).reshape(row_group_size, column_group_size)
+            solutions = self.solver.find_solutions(grid, limit=1, randomize=True, token=token, stats=stats)
+            if solutions:
+                stats.finish()
+                return solutions[0]
+
+    def generate_puzzle(self, grid=None, token=None):
+        stats = self.start_stats()
+        if self.mode == Generator.DIGGING:
+            puzzle, self.last_report = self.dig_puzzle(grid, self.symmetry, self.target_clues, token, stats)
+            return puzzle
+
+        with stats.phase('grid'):
+            grid = self.generate_grid(token, stats) if grid is None else np.array(grid, dtype=int)
+
+        remove = 0
+        with stats.phase('removal'):
+            while remove < self.remove_attempts:
+                row_random, column_random = randrange(0, self.size, 1), randrange(0, self.size, 1)
+                if grid[row_random][column_random] == 0:
+                    continue
+                value = grid[row_random][column_random]
+                grid[row_random][column_random] = 0
+                if self.solver.count_solutions(grid, limit=2, token=token, stats=stats) > 1:
+                    remove += 1
+                    grid[row_random][column_random] = value
+        stats.finish()
+        return grid
+
+    def symmetry_groups(self, symmetry):
+        last = self.size - 1
+        groups = set()
+        for row in range(self.size):
+            for column in range(self.size):
+                if symmetry == Generator.ROTATIONAL:
+                    group = {(row, column), (last - row, last - column)}
+                elif symmetry == Generator.MIRROR:
+                    group = {(row, column), (row, last - column)}
+                elif symmetry == Generator.NO_SYMMETRY:
+                    group = {(row, column)}
+                else:
+                    raise ValueError("Unknown symmetry '{}'".format(symmetry))
+                groups.add(tuple(sorted(row * self.size + column for row, column in group)))
+        return list(groups)
+
+    def has_alternative(self, candidate_values, solution, removed, token=None):
+        # The puzzle was unique before, so any other solution differs in one of the removed cells
+        for cell in removed:
+            mark = candidate_values.mark()
+            found = candidate_values.eliminate(cell, CandidateGrid.to_bit(solution[cell])) \
+                and self.solver.run_search(candidate_values, limit=1, token=token) > 0
+            candidate_values.undo(mark)
+            if found:
+                return True
+        return False
+
+    def has_alternative_within_budget(self, candidate_values, solution, removed, token=None):
+        test_token = CancelToken(node_limit=self.test_budget, parent=token)
+        try:
+            return self.has_alternative(candidate_values, solution, removed, test_token), False
+        except Cancelled:
+            if not test_token.exhausted:
+                raise
+            # The search stopped midway, go back to the state after the last reset
+            candidate_values.undo(0)
+            return True, True
+
+    def dig_puzzle(self, grid=None, symmetry=NO_SYMMETRY, target_clues=None, token=None, stats=None):
+        start = time.perf_counter()
+        stats = self.start_stats(stats)
+        with stats.phase('grid'):
+            solution = self.generate_grid(token, stats) if grid is None else np.array(grid, dtype=int)
+        self.solver.start_stats(stats)
+        solution_values = [int(value) for value in solution.reshape(-1)]
+        puzzle = solution.copy()
+        flat = puzzle.reshape(-1)
+        clues = self.size * self.size
+        candidate_values = self.solver.prepare_candidate_values(puzzle)
+
+        groups = self.symmetry_groups(symmetry)
+        shuffle(groups)
+        tests, undecided = 0, 0
+        for group in groups:
+            if target_clues is not None and clues <= target_clues:
+                break
+            flat[list(group)] = 0
+            with stats.phase('setup'):
+                candidate_values.reset(puzzle)
+            tests += 1
+            if self.test_budget is None:
+                keep = self.has_alternative(candidate_values, solution_values, group, token)
+            else:
+                # Tests that run out of budget keep their clues, so the puzzle stays unique
+                keep, exhausted = self.has_alternative_within_budget(candidate_values, solution_values, group, token)
+                undecided += exhausted
+            if keep:
+                flat[list(group)] = [solution_values[cell] for cell in group]
+            else:
+                clues -= len(group)
+
+        stats.finish()
+        report = {'clues': clues, 'tests': tests, 'undecided': undecided, 'time': time.perf_counter() - start}
+        return puzzle, report
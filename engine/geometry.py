@@ -0,0 +1,64 @@
+class Geometry:
+
+    _cache = {}
+
+    def __init__(self, row_group_size=3, column_group_size=3):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.size = row_group_size * column_group_size
+        self.cells = self.size * self.size
+        self.boxes_in_band = self.size // column_group_size
+        self.full_mask = (1 << self.size) - 1
+
+        self.cell_row = [cell // self.size for cell in range(self.cells)]
+        self.cell_column = [cell % self.size for cell in range(self.cells)]
+        self.cell_box = [self.box_index(self.cell_row[cell], self.cell_column[cell]) for cell in range(self.cells)]
+
+        self.rows = [[row * self.size + column for column in range(self.size)] for row in range(self.size)]
+        self.columns = [[row * self.size + column for row in range(self.size)] for column in range(self.size)]
+        self.boxes = [[] for _ in range(self.size)]
+        for cell in range(self.cells):
+            self.boxes[self.cell_box[cell]].append(cell)
+        self.units = self.rows + self.columns + self.boxes
+
+        # Box/line intersections for locked candidates, row segments first, then column segments
+        self.segments = []
+        segment_line, segment_box = [], []
+        self.cell_segments = [[] for _ in range(self.cells)]
+        for line_number, line in enumerate(self.rows + self.columns):
+            by_box = {}
+            for cell in line:
+                by_box.setdefault(self.cell_box[cell], []).append(cell)
+            for box, cells in sorted(by_box.items()):
+                for cell in cells:
+                    self.cell_segments[cell].append(len(self.segments))
+                self.segments.append(cells)
+                segment_line.append(line_number)
+                segment_box.append((box, line_number < self.size))
+        # Other segments on the same line, and other segments of the same direction in the same box
+        self.line_neighbours = [[other for other in range(len(self.segments))
+                                 if other != segment and segment_line[other] == segment_line[segment]]
+                                for segment in range(len(self.segments))]
+        self.box_neighbours = [[other for other in range(len(self.segments))
+                                if other != segment and segment_box[other] == segment_box[segment]]
+                               for segment in range(len(self.segments))]
+
+        self.peers = []
+        for cell in range(self.cells):
+            peers = set(self.rows[self.cell_row[cell]]) | set(self.columns[self.cell_column[cell]]) \
+                    | set(self.boxes[self.cell_box[cell]])
+            peers.discard(cell)
+            self.peers.append(sorted(peers))
+
+    @staticmethod
+    def get(row_group_size=3, column_group_size=3):
+        key = (row_group_size, column_group_size)
+        if key not in Geometry._cache:
+            Geometry._cache[key] = Geometry(row_group_size, column_group_size)
+        return Geometry._cache[key]
+
+    def box_index(self, row, column):
+        return (row // self.row_group_size) * self.boxes_in_band + column // self.column_group_size
+
+    def cell_index(self, row, column):
+        return row * self.size + column
@@ -0,0 +1,71 @@
+from engine.geometry import Geometry
+
+
+class Occupancy:
+
+    def __init__(self, grid=None, row_group_size=3, column_group_size=3):
+        self.geometry = Geometry.get(row_group_size, column_group_size)
+        self.size = self.geometry.size
+        # Units of a cell as indexes into counts: its row, its column and its box
+        self.cell_units = [(self.geometry.cell_row[cell], self.size + self.geometry.cell_column[cell],
+                            2 * self.size + self.geometry.cell_box[cell]) for cell in range(self.geometry.cells)]
+        self.load(grid)
+
+    def load(self, grid=None):
+        self.values = [0] * self.geometry.cells
+        self.counts = [[0] * (self.size + 1) for _ in range(3 * self.size)]
+        self.duplicates = set()
+        self.filled = 0
+        if grid is not None:
+            for i in range(self.size):
+                for j in range(self.size):
+                    if grid[i][j] != 0:
+                        self.set(i, j, int(grid[i][j]))
+
+    def update_units(self, cell, value, change):
+        for unit in self.cell_units[cell]:
+            count = self.counts[unit][value] + change
+            self.counts[unit][value] = count
+            if count > 1:
+                self.duplicates.add((unit, value))
+            else:
+                self.duplicates.discard((unit, value))
+
+    def set(self, row, column, value):
+        cell = self.geometry.cell_index(row, column)
+        old = self.values[cell]
+        if old == value:
+            return [(row, column)]
+        if old != 0:
+            self.update_units(cell, old, -1)
+            self.filled -= 1
+        if value != 0:
+            self.update_units(cell, value, 1)
+            self.filled += 1
+        self.values[cell] = value
+        # Cells whose conflict state may have changed
+        affected = [(row, column)]
+        for peer in self.geometry.peers[cell]:
+            if self.values[peer] != 0 and self.values[peer] in (old, value):
+                affected.append((self.geometry.cell_row[peer], self.geometry.cell_column[peer]))
+        return affected
+
+    def is_conflicting(self, row, column):
+        cell = self.geometry.cell_index(row, column)
+        value = self.values[cell]
+        return value != 0 and any(self.counts[unit][value] > 1 for unit in self.cell_units[cell])
+
+    def has_conflicts(self):
+        return bool(self.duplicates)
+
+    def is_complete(self):
+        return self.filled == self.geometry.cells and not self.duplicates
+
+    def conflicts(self):
+        units = self.geometry.rows + self.geometry.columns + self.geometry.boxes
+        cells = set()
+        for unit, value in self.duplicates:
+            for cell in units[unit]:
+                if self.values[cell] == value:
+                    cells.add((self.geometry.cell_row[cell], self.geometry.cell_column[cell]))
+        return sorted(cells)
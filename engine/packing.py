@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def bits_per_cell(size):
+    return 4 if size <= 15 else 8
+
+
+def packed_length(cells, size):
+    return (cells + 1) // 2 if bits_per_cell(size) == 4 else cells
+
+
+def pack_cells(values, size):
+    # Two cells per byte while every value fits in a nibble, plain bytes otherwise
+    values = np.asarray(values, dtype=np.uint8)
+    if bits_per_cell(size) == 8:
+        return values.copy()
+    if values.shape[-1] % 2:
+        values = np.concatenate([values, np.zeros(values.shape[:-1] + (1,), dtype=np.uint8)], axis=-1)
+    return (values[..., 0::2] << 4) | values[..., 1::2]
+
+
+def unpack_cells(packed, cells, size):
+    packed = np.asarray(packed, dtype=np.uint8)
+    if bits_per_cell(size) == 8:
+        return packed[..., :cells].copy()
+    values = np.empty(packed.shape[:-1] + (packed.shape[-1] * 2,), dtype=np.uint8)
+    values[..., 0::2] = packed >> 4
+    values[..., 1::2] = packed & 0x0F
+    return values[..., :cells]
@@ -0,0 +1,207 @@
+import itertools
+import multiprocessing
+import random
+import signal
+import threading
+from multiprocessing import Array, Pool
+from random import shuffle
+
+import numpy as np
+
+from engine.cancellation import CancelToken, Cancelled
+from engine.candidates import CandidateGrid
+from engine.solver import Solver
+
+solver = None
+stopped_generations = None
+
+
+class StopToken(CancelToken):
+
+    # Reading the shared slots takes a lock shared by all processes, so they are looked at only every few nodes
+    POLL_INTERVAL = 64
+
+    def __init__(self, stopped, generation):
+        super().__init__()
+        self.stopped = stopped
+        self.generation = generation
+        self.slot = generation % len(stopped)
+
+    def check(self):
+        super().check()
+        if self.progress % StopToken.POLL_INTERVAL == 1 and self.stopped[self.slot] == self.generation:
+            self.cancelled = True
+            raise Cancelled()
+
+
+def init_worker(row_group_size, column_group_size, stopped):
+    global solver, stopped_generations
+    # Workers forked from the board inherit the SIGTERM handler of SDL, which would keep Pool.terminate waiting
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    random.seed()
+    solver = Solver(row_group_size, column_group_size)
+    stopped_generations = stopped
+
+
+def search_unit(unit):
+    grid, path, limit, randomize, generation = unit
+    stats = solver.start_stats()
+    candidate_values = solver.prepare_candidate_values(grid)
+    solutions = []
+    # Branch choices were consistent when the unit was split off, propagation in the search redoes the rest
+    if all(candidate_values.assign(cell, value) for cell, value in path):
+        try:
+            solver.run_search(candidate_values, limit, solutions, randomize, StopToken(stopped_generations, generation))
+        except Cancelled:
+            pass
+    return solutions, stats.finish().as_dict()
+
+
+class ParallelSolver(Solver):
+
+    # Searches running at the same time must not share a slot, older ones have long stopped when it is reused
+    STOP_SLOTS = 64
+
+    def __init__(self, row_group_size=3, column_group_size=3, processes=None, units_per_process=4, max_split_depth=4,
+                 sequential_budget=200):
+        super().__init__(row_group_size, column_group_size)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.units_per_process = units_per_process
+        self.max_split_depth = max_split_depth
+        # Puzzles solved within this many nodes never reach the pool
+        self.sequential_budget = sequential_budget
+        self.pool = None
+        # Every parallel search tags its units with a new generation, stopping one never touches the others
+        self.generations = itertools.count(1)
+        self.stopped_generations = None
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.stopped_generations = Array('q', ParallelSolver.STOP_SLOTS)
+                self.pool = Pool(self.processes, initializer=init_worker,
+                                 initargs=(self.row_group_size, self.column_group_size, self.stopped_generations))
+            return self.pool
+
+    def close(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+
+    def split(self, candidate_values, limit, depth, path, units, solutions, token=None):
+        # Walk the first branch points and collect the paths below them as work units
+        if token is not None:
+            token.check()
+        self.stats.nodes += 1
+        if not self.propagator.propagate(candidate_values):
+            return 0
+        cell = candidate_values.get_empty_cell()
+        if cell < 0:
+            solutions.append(list(candidate_values.values))
+            return 1
+        if depth == 0:
+            units.append(list(path))
+            return 0
+        count = 0
+        for option in CandidateGrid.to_values(candidate_values.masks[cell]):
+            mark = candidate_values.mark()
+            if candidate_values.assign(cell, option):
+                path.append((cell, option))
+                count += self.split(candidate_values, limit - count, depth - 1, path, units, solutions, token)
+                path.pop()
+            candidate_values.undo(mark)
+            if count >= limit:
+                break
+        return count
+
+    def split_units(self, candidate_values, limit, token=None):
+        target = self.processes * self.units_per_process
+        for depth in range(1, self.max_split_depth + 1):
+            units, solutions = [], []
+            mark = candidate_values.mark()
+            count = self.split(candidate_values, limit, depth, [], units, solutions, token)
+            candidate_values.undo(mark)
+            if count >= limit or len(units) >= target:
+                break
+        return units, solutions, depth
+
+    def parallel_search(self, grid, limit, randomize=False, token=None, stats=None):
+        stats = self.start_stats(stats)
+        with stats.phase('setup'):
+            candidate_values = self.prepare_candidate_values(grid)
+        if not candidate_values.valid:
+            stats.finish()
+            return []
+
+        solutions = []
+        budget_token = CancelToken(node_limit=self.sequential_budget, parent=token)
+        mark = candidate_values.mark()
+        try:
+            self.run_search(candidate_values, limit, solutions, randomize, budget_token)
+            stats.finish()
+            return solutions
+        except Cancelled:
+            if not budget_token.exhausted:
+                raise
+            candidate_values.undo(mark)
+
+        with stats.phase('split'):
+            units, solutions, depth = self.split_units(candidate_values, limit, token)
+        if randomize:
+            shuffle(units)
+        if len(solutions) < limit and units:
+            self.search_units(np.asarray(grid, dtype=int), units, depth, limit, solutions, randomize, token, stats)
+        stats.finish()
+        return solutions[:limit]
+
+    def stop(self, generation):
+        self.stopped_generations[generation % ParallelSolver.STOP_SLOTS] = generation
+
+    def search_units(self, grid, units, depth, limit, solutions, randomize, token=None, stats=None):
+        stats = self.stats if stats is None else stats
+        pool = self.get_pool()
+        generation = next(self.generations)
+        remaining = limit - len(solutions)
+        pending = len(units)
+        # One unit per task, so idle workers keep taking whatever is left
+        results = pool.imap_unordered(search_unit, [(grid, path, remaining, randomize, generation) for path in units],
+                                      chunksize=1)
+        try:
+            with stats.phase('parallel'):
+                while pending:
+                    if token is not None:
+                        token.check()
+                    try:
+                        unit_solutions, unit_stats = results.next(timeout=0.05)
+                    except multiprocessing.TimeoutError:
+                        continue
+                    pending -= 1
+                    solutions.extend(unit_solutions)
+                    stats.nodes += unit_stats['nodes']
+                    stats.backtracks += unit_stats['backtracks']
+                    stats.propagations += unit_stats['propagations']
+                    stats.max_depth = max(stats.max_depth, depth + unit_stats['max_depth'])
+                    for phase, elapsed in unit_stats['phases'].items():
+                        stats.add_time('worker ' + phase, elapsed)
+                    if len(solutions) >= limit:
+                        break
+        finally:
+            # Units of this search still queued or running give up within a few nodes, their results are dropped
+            if pending:
+                self.stop(generation)
+
+    def find_solutions(self, grid, limit=2, randomize=False, token=None, stats=None):
+        solutions = self.parallel_search(grid, limit, randomize, token, stats)
+        return [np.array(solution, dtype=int).reshape(self.size, self.size) for solution in solutions]
+
+    def count_solutions(self, grid, limit=2, token=None, stats=None):
+        return len(self.parallel_search(grid, limit, token=token, stats=stats))
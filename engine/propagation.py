@@ -0,0 +1,121 @@
+class Propagator:
+
+    def __init__(self, naked_singles=True, hidden_singles=True, locked_candidates=True):
+        self.naked_singles = naked_singles
+        self.hidden_singles = hidden_singles
+        self.locked_candidates = locked_candidates
+        self.counts = {'naked_singles': 0, 'hidden_singles': 0, 'locked_candidates': 0}
+
+    def reset_counts(self):
+        for technique in self.counts:
+            self.counts[technique] = 0
+
+    def propagate(self, candidate_values):
+        if not self.naked_singles:
+            candidate_values.singles.clear()
+        # Run cheapest techniques first and start over whenever one of them makes progress
+        while True:
+            if self.naked_singles:
+                progress = self.apply_naked_singles(candidate_values)
+                if progress is None:
+                    return False
+            if self.hidden_singles:
+                progress = self.apply_hidden_singles(candidate_values)
+                if progress is None:
+                    return False
+                if progress:
+                    continue
+            if self.locked_candidates:
+                progress = self.apply_locked_candidates(candidate_values)
+                if progress is None:
+                    return False
+                if progress:
+                    continue
+            return True
+
+    def apply_naked_singles(self, candidate_values):
+        # Works through the queue until it is empty, so there is never anything left to retry
+        values, masks, singles = candidate_values.values, candidate_values.masks, candidate_values.singles
+        progress = False
+        while singles:
+            cell = singles.pop()
+            mask = masks[cell]
+            if values[cell] == 0 and mask & (mask - 1) == 0:
+                if mask == 0:
+                    return None
+                self.counts['naked_singles'] += 1
+                progress = True
+                if not candidate_values.assign(cell, mask.bit_length()):
+                    return None
+        return progress
+
+    def apply_hidden_singles(self, candidate_values):
+        values, masks = candidate_values.values, candidate_values.masks
+        full_mask = candidate_values.geometry.full_mask
+        size = candidate_values.size
+        unit_masks = (candidate_values.row_masks, candidate_values.column_masks, candidate_values.box_masks)
+        progress = False
+        for number, unit in enumerate(candidate_values.geometry.units):
+            # Read placed digits only now, singles in earlier units may have changed them
+            placed = unit_masks[number // size][number % size]
+            if placed == full_mask:
+                continue
+            # A placed cell keeps only its own digit, so it never counts twice
+            once, twice = 0, 0
+            for cell in unit:
+                mask = masks[cell]
+                twice |= once & mask
+                once |= mask
+            if once != full_mask:
+                return None
+            singles = once & ~twice & ~placed
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for cell in unit:
+                    if values[cell] == 0 and masks[cell] & bit:
+                        self.counts['hidden_singles'] += 1
+                        progress = True
+                        if not candidate_values.assign(cell, bit.bit_length()):
+                            return None
+                        break
+                else:
+                    # An earlier single in this unit took the only cell left for this digit
+                    return None
+        return progress
+
+    def apply_locked_candidates(self, candidate_values):
+        values, masks = candidate_values.values, candidate_values.masks
+        geometry = candidate_values.geometry
+        segment_masks = [0] * len(geometry.segments)
+        for cell, segments in enumerate(geometry.cell_segments):
+            if values[cell] == 0:
+                for segment in segments:
+                    segment_masks[segment] |= masks[cell]
+
+        for segment, common in enumerate(segment_masks):
+            if common == 0:
+                continue
+            line_rest = 0
+            for other in geometry.line_neighbours[segment]:
+                line_rest |= segment_masks[other]
+            box_rest = 0
+            for other in geometry.box_neighbours[segment]:
+                box_rest |= segment_masks[other]
+            # Pointing: digit confined to the intersection within the box leaves the rest of the line
+            pointing = common & ~box_rest & line_rest
+            # Claiming: digit confined to the intersection within the line leaves the rest of the box
+            claiming = common & ~line_rest & box_rest
+            if not pointing and not claiming:
+                continue
+            self.counts['locked_candidates'] += 1
+            for mask, others in ((pointing, geometry.line_neighbours[segment]),
+                                 (claiming, geometry.box_neighbours[segment])):
+                if mask:
+                    for other in others:
+                        for cell in geometry.segments[other]:
+                            if values[cell] == 0 and not candidate_values.eliminate(cell, mask):
+                                return None
+            # Segment masks are stale now, let the cheaper techniques run first
+            return True
+        return False
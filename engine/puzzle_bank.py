@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+
+from engine.packing import pack_cells, packed_length, unpack_cells
+
+HEADER_DTYPE = np.dtype([('magic', 'S4'), ('version', np.uint8), ('row_group_size', np.uint8),
+                         ('column_group_size', np.uint8), ('has_solutions', np.uint8), ('count', '<u8'),
+                         ('reserved', np.uint8, 48)])
+MAGIC = b'SDKB'
+VERSION = 1
+LEVELS = 256
+
+
+def record_dtype(row_group_size, column_group_size, has_solutions):
+    size = row_group_size * column_group_size
+    length = packed_length(size * size, size)
+    fields = [('clues', np.uint8, length)]
+    if has_solutions:
+        fields.append(('solution', np.uint8, length))
+    fields += [('clue_count', '<u2'), ('difficulty', np.uint8), ('nodes', '<u4'), ('generation_time', '<f4')]
+    return np.dtype(fields)
+
+
+def difficulty_level(nodes):
+    # Logarithmic buckets of search nodes, 0 and 1 for puzzles solved by propagation alone
+    return min(LEVELS - 1, int(nodes).bit_length())
+
+
+def parse_difficulty_range(text):
+    # 'MIN-MAX' or a single level, as difficulty levels of the bank index
+    try:
+        levels = [int(part) for part in text.split('-')]
+    except ValueError:
+        raise ValueError("Expected difficulty as MIN-MAX, got '{}'".format(text))
+    if len(levels) == 1:
+        levels *= 2
+    if len(levels) != 2 or not 0 <= levels[0] <= levels[1] < LEVELS:
+        raise ValueError("Unsupported difficulty range '{}'".format(text))
+    return tuple(levels)
+
+
+def index_path(path):
+    return path + '.idx'
+
+
+class PuzzleBankWriter:
+
+    def __init__(self, path, row_group_size=3, column_group_size=3, has_solutions=True, buffer_size=4096):
+        self.path = path
+        self.size = row_group_size * column_group_size
+        self.header = np.zeros(1, dtype=HEADER_DTYPE)
+        self.header['magic'] = MAGIC
+        self.header['version'] = VERSION
+        self.header['row_group_size'] = row_group_size
+        self.header['column_group_size'] = column_group_size
+        self.header['has_solutions'] = has_solutions
+        self.dtype = record_dtype(row_group_size, column_group_size, has_solutions)
+        self.has_solutions = has_solutions
+        self.buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self.buffered = 0
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.header.tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, puzzle, solution=None, nodes=0, generation_time=0.0, difficulty=None):
+        record = self.buffer[self.buffered]
+        values = np.asarray(puzzle, dtype=np.uint8).reshape(-1)
+        record['clues'] = pack_cells(values, self.size)
+        if self.has_solutions:
+            if solution is None:
+                raise ValueError("This bank stores solutions, one is required for every puzzle")
+            record['solution'] = pack_cells(np.asarray(solution, dtype=np.uint8).reshape(-1), self.size)
+        record['clue_count'] = np.count_nonzero(values)
+        record['nodes'] = min(nodes, np.iinfo(np.uint32).max)
+        record['generation_time'] = generation_time
+        record['difficulty'] = difficulty_level(nodes) if difficulty is None else difficulty
+        self.buffered += 1
+        self.count += 1
+        if self.buffered == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer[:self.buffered].tobytes())
+        self.buffered = 0
+
+    def close(self):
+        if self.file is None:
+            return
+        self.flush()
+        self.header['count'] = self.count
+        self.file.seek(0)
+        self.file.write(self.header.tobytes())
+        self.file.close()
+        self.file = None
+        PuzzleBank(self.path, load_index=False).build_index()
+
+
+class PuzzleBank:
+
+    def __init__(self, path, load_index=True):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC or header['version'][0] != VERSION:
+            raise ValueError("'{}' is not a puzzle bank".format(path))
+        self.row_group_size = int(header['row_group_size'][0])
+        self.column_group_size = int(header['column_group_size'][0])
+        self.size = self.row_group_size * self.column_group_size
+        self.has_solutions = bool(header['has_solutions'][0])
+        self.dtype = record_dtype(self.row_group_size, self.column_group_size, self.has_solutions)
+        count = int(header['count'][0])
+        self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,)) \
+            if count else np.zeros(0, dtype=self.dtype)
+
+        self.level_starts = None
+        self.order = None
+        if load_index:
+            self.load_index()
+
+    def __len__(self):
+        return len(self.records)
+
+    def build_index(self):
+        # Record numbers grouped by difficulty, plus where each level starts
+        difficulty = np.asarray(self.records['difficulty'])
+        order = np.argsort(difficulty, kind='stable').astype('<u4')
+        level_starts = np.searchsorted(difficulty[order], np.arange(LEVELS + 1)).astype('<u8')
+        with open(index_path(self.path), 'wb') as file:
+            file.write(level_starts.tobytes())
+            file.write(order.tobytes())
+
+    def load_index(self):
+        path = index_path(self.path)
+        if not os.path.exists(path):
+            self.build_index()
+        self.level_starts = np.fromfile(path, dtype='<u8', count=LEVELS + 1)
+        self.order = np.memmap(path, dtype='<u4', mode='r', offset=(LEVELS + 1) * 8, shape=(len(self),)) \
+            if len(self) else np.zeros(0, dtype='<u4')
+
+    def levels(self):
+        counts = np.diff(self.level_starts)
+        return {int(level): int(counts[level]) for level in np.nonzero(counts)[0]}
+
+    def puzzle(self, number):
+        record = self.records[number]
+        cells = self.size * self.size
+        clues = unpack_cells(record['clues'], cells, self.size).astype(int).reshape(self.size, self.size)
+        solution = None
+        if self.has_solutions:
+            solution = unpack_cells(record['solution'], cells, self.size).astype(int).reshape(self.size, self.size)
+        metadata = {'clue_count': int(record['clue_count']), 'difficulty': int(record['difficulty']),
+                    'nodes': int(record['nodes']), 'generation_time': float(record['generation_time'])}
+        return clues, solution, metadata
+
+    def random(self, min_difficulty=0, max_difficulty=LEVELS - 1, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        start, end = int(self.level_starts[min_difficulty]), int(self.level_starts[max_difficulty + 1])
+        if start == end:
+            return None
+        return self.puzzle(int(self.order[rng.integers(start, end)]))
+
+
+def measure_nodes(solver, puzzle):
+    status, solution = solver.solve(puzzle)
+    return status, solution, solver.last_stats.nodes
@@ -0,0 +1,35 @@
+import numpy as np
+
+EMPTY_SYMBOLS = '.0'
+# Values above 9 continue with letters, so boards up to 35x35 fit one symbol per cell
+VALUE_SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def parse_puzzle(line, size=9):
+    line = line.strip()
+    if len(line) != size * size:
+        raise ValueError("Expected {} symbols, got {}".format(size * size, len(line)))
+    values = []
+    for symbol in line:
+        if symbol in EMPTY_SYMBOLS:
+            values.append(0)
+        elif symbol.upper() in VALUE_SYMBOLS[:size]:
+            values.append(VALUE_SYMBOLS.index(symbol.upper()) + 1)
+        else:
+            raise ValueError("Unexpected symbol '{}'".format(symbol))
+    return np.array(values, dtype=int).reshape(size, size)
+
+
+def format_puzzle(grid):
+    return ''.join(VALUE_SYMBOLS[value - 1] if value != 0 else '.' for value in np.asarray(grid).reshape(-1))
+
+
+def parse_box_size(text):
+    # 'RxC' for boxes of R rows and C columns, e.g. '2x3' for 6x6 boards
+    try:
+        rows, columns = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise ValueError("Expected box size as RxC, got '{}'".format(text))
+    if rows < 1 or columns < 1 or rows * columns > len(VALUE_SYMBOLS):
+        raise ValueError("Unsupported box size '{}'".format(text))
+    return rows, columns
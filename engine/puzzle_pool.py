@@ -0,0 +1,115 @@
+import os
+import queue
+import random
+import signal
+import time
+from multiprocessing import Event, Process, Queue
+
+from engine.generator import Generator
+from engine.transforms import GridFactory
+
+
+def produce(puzzles, stop, row_group_size, column_group_size, generator_options):
+    # Forked from the board, the producer inherits the SIGTERM handler of SDL and would ignore terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Stay behind the UI process when competing for the CPU
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    random.seed()
+    grid_factory = GridFactory(row_group_size, column_group_size)
+    generator = Generator(row_group_size, column_group_size, grid_factory=grid_factory, **generator_options)
+    while not stop.is_set():
+        start = time.perf_counter()
+        puzzle = generator.generate_puzzle()
+        item = (puzzle, time.perf_counter() - start, generator.last_stats.as_dict())
+        while not stop.is_set():
+            try:
+                puzzles.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                pass
+
+
+class PuzzlePool:
+
+    def __init__(self, row_group_size=3, column_group_size=3, capacity=8, **generator_options):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.generator_options = generator_options
+        self.capacity = capacity
+        self.generator = Generator(row_group_size, column_group_size, **generator_options)
+
+        self.puzzles = Queue(maxsize=capacity)
+        self.stop_event = Event()
+        self.producer = None
+
+        self.served = 0
+        self.on_demand = 0
+        self.generation_time = 0.0
+        self.last_generation_time = None
+        # Search stats of the last puzzle served, as a plain dict
+        self.last_stats = None
+
+    def start(self):
+        if self.producer is not None:
+            return
+        self.stop_event.clear()
+        self.producer = Process(target=produce, daemon=True,
+                                args=(self.puzzles, self.stop_event, self.row_group_size, self.column_group_size,
+                                      self.generator_options))
+        self.producer.start()
+
+    def stop(self):
+        if self.producer is None:
+            return
+        self.stop_event.set()
+        # Drain so the producer is not blocked on a full queue
+        while self.take(record=False) is not None:
+            pass
+        self.producer.join(timeout=1)
+        if self.producer.is_alive():
+            self.producer.terminate()
+            self.producer.join()
+        self.producer = None
+
+    def record(self, generation_time, stats):
+        self.generation_time += generation_time
+        self.last_generation_time = generation_time
+        self.last_stats = stats
+
+    def take(self, record=True):
+        try:
+            puzzle, generation_time, stats = self.puzzles.get_nowait()
+        except queue.Empty:
+            return None
+        if record:
+            self.served += 1
+            self.record(generation_time, stats)
+        return puzzle
+
+    def get(self, token=None):
+        puzzle = self.take()
+        if puzzle is not None:
+            return puzzle
+        start = time.perf_counter()
+        puzzle = self.generator.generate_puzzle(token=token)
+        self.on_demand += 1
+        self.record(time.perf_counter() - start, self.generator.last_stats.as_dict())
+        return puzzle
+
+    def depth(self):
+        try:
+            return self.puzzles.qsize()
+        except NotImplementedError:
+            return None
+
+    def stats(self):
+        total = self.served + self.on_demand
+        return {
+            'depth': self.depth(),
+            'capacity': self.capacity,
+            'served': self.served,
+            'on_demand': self.on_demand,
+            'last_generation_time': self.last_generation_time,
+            'mean_generation_time': self.generation_time / total if total else None,
+        }
@@ -0,0 +1,46 @@
+import time
+from contextlib import contextmanager
+
+
+class SearchStats:
+
+    def __init__(self, hooks=None):
+        # Hooks are called as hook(phase, elapsed) whenever time is added to a phase
+        self.hooks = [] if hooks is None else list(hooks)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.propagations = 0
+        self.phases = {}
+
+    def add_time(self, phase, elapsed):
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        for hook in self.hooks:
+            hook(phase, elapsed)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self):
+        # Plain values only, so the stats can cross process boundaries
+        return {'elapsed': self.elapsed, 'nodes': self.nodes, 'backtracks': self.backtracks,
+                'max_depth': self.max_depth, 'propagations': self.propagations, 'phases': dict(self.phases)}
+
+    @staticmethod
+    def describe(stats):
+        lines = ["{:.1f} ms, {} nodes, {} backtracks".format(stats['elapsed'] * 1000, stats['nodes'],
+                                                             stats['backtracks']),
+                 "depth {}, {} propagations".format(stats['max_depth'], stats['propagations'])]
+        lines += ["{} {:.1f} ms".format(phase, elapsed * 1000) for phase, elapsed in stats['phases'].items()]
+        return lines
@@ -0,0 +1,176 @@
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from itertools import permutations
+from math import factorial
+
+import numpy as np
+
+from engine.packing import pack_cells, packed_length, unpack_cells
+from engine.solver import Solver
+
+
+class CanonicalForm:
+
+    _cache = {}
+    MAX_TRANSFORMS = 4096
+
+    def __init__(self, row_group_size=3, column_group_size=3):
+        self.size = row_group_size * column_group_size
+        size = self.size
+        bands, stacks = size // row_group_size, size // column_group_size
+        # Band and stack orders grow factorially, large boards only fold transposition
+        if factorial(bands) * factorial(stacks) > CanonicalForm.MAX_TRANSFORMS:
+            band_orders, stack_orders = [tuple(range(bands))], [tuple(range(stacks))]
+        else:
+            band_orders, stack_orders = list(permutations(range(bands))), list(permutations(range(stacks)))
+        indices = []
+        for band_order in band_orders:
+            rows = np.array([band * row_group_size + i for band in band_order for i in range(row_group_size)])
+            for stack_order in stack_orders:
+                columns = np.array([stack * column_group_size + j for stack in stack_order
+                                    for j in range(column_group_size)])
+                indices.append((rows[:, None] * size + columns[None, :]).reshape(-1))
+                # Transposing keeps the box shape only when boxes are square
+                if row_group_size == column_group_size:
+                    indices.append((columns[None, :] * size + rows[:, None]).reshape(-1))
+        # Row t lists, for every cell of the transformed grid, the source cell
+        self.indices = np.array(indices)
+
+    @staticmethod
+    def get(row_group_size=3, column_group_size=3):
+        key = (row_group_size, column_group_size)
+        if key not in CanonicalForm._cache:
+            CanonicalForm._cache[key] = CanonicalForm(row_group_size, column_group_size)
+        return CanonicalForm._cache[key]
+
+    def find(self, grid):
+        flat = np.asarray(grid, dtype=np.intp).reshape(-1)
+        transformed = flat[self.indices]
+        count, cells = transformed.shape
+        # Relabel digits in order of first appearance, the smallest relabeling of each candidate
+        first = np.full((count, self.size + 1), cells, dtype=np.intp)
+        np.minimum.at(first, (np.repeat(np.arange(count), cells), transformed.reshape(-1)),
+                      np.tile(np.arange(cells), count))
+        first[:, 0] = -1
+        order = np.argsort(first, axis=1, kind='stable')
+        labels = np.empty_like(order)
+        np.put_along_axis(labels, order, np.arange(self.size + 1)[None, :].repeat(count, axis=0), axis=1)
+        relabeled = np.take_along_axis(labels, transformed, axis=1)
+        best = np.lexsort(relabeled.T[::-1])[0]
+        return relabeled[best].astype(np.uint8), self.indices[best], labels[best]
+
+    @staticmethod
+    def apply(values, index, labels):
+        return labels[np.asarray(values, dtype=np.intp).reshape(-1)[index]].astype(np.uint8)
+
+    @staticmethod
+    def invert(values, index, labels):
+        original = np.empty(len(index), dtype=np.intp)
+        original[index] = np.argsort(labels)[np.asarray(values, dtype=np.intp)]
+        return original
+
+
+class SolutionCache:
+    MAGIC = b'SDKC'
+
+    def __init__(self, row_group_size=3, column_group_size=3, capacity=4096, path=None):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.size = row_group_size * column_group_size
+        self.canonical_form = CanonicalForm.get(row_group_size, column_group_size)
+        self.capacity = capacity
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path is not None and os.path.exists(path):
+            try:
+                self.load()
+            except ValueError as error:
+                # A damaged cache only costs the solves it held, it is rewritten on the next save
+                warnings.warn("Ignoring solution cache: {}".format(error))
+
+    def lookup(self, grid):
+        key, index, labels = self.canonical_form.find(grid)
+        with self.lock:
+            entry = self.entries.get(key.tobytes())
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key.tobytes())
+            self.hits += 1
+        status, canonical_solution = entry
+        if canonical_solution is None:
+            return status, None
+        solution = CanonicalForm.invert(canonical_solution, index, labels)
+        return status, solution.reshape(self.size, self.size)
+
+    def store(self, grid, status, solution=None):
+        key, index, labels = self.canonical_form.find(grid)
+        canonical_solution = None if solution is None else CanonicalForm.apply(solution, index, labels)
+        self.insert(key.tobytes(), status, canonical_solution)
+
+    def insert(self, key, status, canonical_solution):
+        with self.lock:
+            self.entries[key] = (status, canonical_solution)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def solve(self, solver, grid, token=None, stats=None):
+        cached = self.lookup(grid)
+        if cached is not None:
+            return cached
+        status, solution = solver.solve(grid, token, stats)
+        self.store(grid, status, solution)
+        return status, solution
+
+    def stats(self):
+        return {'entries': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def record_dtype(self):
+        length = packed_length(self.size * self.size, self.size)
+        return np.dtype([('key', np.uint8, length), ('status', np.uint8), ('solution', np.uint8, length)])
+
+    def save(self, path=None):
+        path = self.path if path is None else path
+        with self.lock:
+            items = list(self.entries.items())
+        records = np.zeros(len(items), dtype=self.record_dtype())
+        for record, (key, (status, canonical_solution)) in zip(records, items):
+            record['key'] = pack_cells(np.frombuffer(key, dtype=np.uint8), self.size)
+            record['status'] = status
+            if canonical_solution is not None:
+                record['solution'] = pack_cells(canonical_solution, self.size)
+        with open(path, 'wb') as file:
+            file.write(SolutionCache.MAGIC + bytes([self.size]))
+            file.write(records.tobytes())
+        return len(records)
+
+    def load(self, path=None):
+        path = self.path if path is None else path
+        cells = self.size * self.size
+        with open(path, 'rb') as file:
+            header = file.read(len(SolutionCache.MAGIC) + 1)
+            if header[:-1] != SolutionCache.MAGIC or header[-1:] != bytes([self.size]):
+                raise ValueError("'{}' is not a solution cache for {}x{} grids".format(path, self.size, self.size))
+            data = file.read()
+        dtype = self.record_dtype()
+        if len(data) % dtype.itemsize:
+            raise ValueError("'{}' is truncated".format(path))
+        records = np.frombuffer(data, dtype=dtype)
+        for record in records:
+            key = unpack_cells(record['key'], cells, self.size)
+            solution = None
+            if record['status'] == Solver.SOLVED:
+                solution = unpack_cells(record['solution'], cells, self.size)
+            self.insert(key.tobytes(), int(record['status']), solution)
+        return len(records)
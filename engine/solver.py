@@ -0,0 +1,109 @@
+import time
+from random import shuffle
+
+import numpy as np
+
+from engine.candidates import CandidateGrid
+from engine.propagation import Propagator
+from engine.search_stats import SearchStats
+
+
+class Solver:
+    UNSOLVABLE = 0
+    SOLVED = 1
+    NOT_UNIQUE = 2
+
+    def __init__(self, row_group_size=3, column_group_size=3, propagator=None):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.size = row_group_size * column_group_size
+        self.propagator = Propagator() if propagator is None else propagator
+        self.hooks = []
+        # Counters of the running operation, kept afterwards as the stats of the last one
+        self.stats = SearchStats()
+        self.last_stats = self.stats
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def start_stats(self, stats=None):
+        # Callers running several operations pass their own stats to add everything up
+        self.stats = SearchStats(self.hooks) if stats is None else stats
+        self.last_stats = self.stats
+        return self.stats
+
+    def prepare_candidate_values(self, grid):
+        return CandidateGrid(grid, self.row_group_size, self.column_group_size)
+
+    def run_search(self, candidate_values, limit, solutions=None, randomize=False, token=None):
+        counts = self.propagator.counts if self.propagator else {}
+        propagated = sum(counts.values())
+        try:
+            with self.stats.phase('search'):
+                return self.search(candidate_values, limit, solutions, randomize, token)
+        finally:
+            self.stats.propagations += sum(counts.values()) - propagated
+
+    def search(self, candidate_values, limit, solutions=None, randomize=False, token=None, depth=0):
+        if token is not None:
+            token.check()
+        stats = self.stats
+        stats.nodes += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        # Fill forced cells before branching
+        if self.propagator:
+            start = time.perf_counter()
+            consistent = self.propagator.propagate(candidate_values)
+            stats.add_time('propagation', time.perf_counter() - start)
+            if not consistent:
+                return 0
+        # Choose empty cell with fewest candidate values
+        cell = candidate_values.get_empty_cell()
+        # Solved
+        if cell < 0:
+            if solutions is not None:
+                solutions.append(list(candidate_values.values))
+            return 1
+        options = CandidateGrid.to_values(candidate_values.masks[cell])
+        if randomize:
+            shuffle(options)
+        count = 0
+        for option in options:
+            mark = candidate_values.mark()
+            found = 0
+            if candidate_values.assign(cell, option):
+                found = self.search(candidate_values, limit - count, solutions, randomize, token, depth + 1)
+            candidate_values.undo(mark)
+            if found == 0:
+                stats.backtracks += 1
+            count += found
+            if count >= limit:
+                break
+        return count
+
+    def find_solutions(self, grid, limit=2, randomize=False, token=None, stats=None):
+        stats = self.start_stats(stats)
+        with stats.phase('setup'):
+            candidate_values = self.prepare_candidate_values(grid)
+        solutions = []
+        if candidate_values.valid:
+            self.run_search(candidate_values, limit, solutions, randomize, token)
+        stats.finish()
+        return [np.array(solution, dtype=int).reshape(self.size, self.size) for solution in solutions]
+
+    def count_solutions(self, grid, limit=2, token=None, stats=None):
+        stats = self.start_stats(stats)
+        with stats.phase('setup'):
+            candidate_values = self.prepare_candidate_values(grid)
+        count = self.run_search(candidate_values, limit, token=token) if candidate_values.valid else 0
+        stats.finish()
+        return count
+
+    def solve(self, grid, token=None, stats=None):
+        solutions = self.find_solutions(grid, limit=2, token=token, stats=stats)
+        if len(solutions) == 0:
+            return Solver.UNSOLVABLE, None
+        if len(solutions) > 1:
+            return Solver.NOT_UNIQUE, None
+        return Solver.SOLVED, solutions[0]
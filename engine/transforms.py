@@ -0,0 +1,73 @@
+import numpy as np
+
+from engine.generator import Generator
+
+
+def pattern_grid(row_group_size=3, column_group_size=3):
+    size = row_group_size * column_group_size
+    rows = np.arange(size)[:, None]
+    columns = np.arange(size)[None, :]
+    return (column_group_size * (rows % row_group_size) + rows // row_group_size + columns) % size + 1
+
+
+def random_permutations(rng, count, length):
+    return rng.random((count, length)).argsort(axis=1)
+
+
+def line_order(rng, count, groups, group_size):
+    # Shuffle whole groups (bands or stacks) and the lines inside every group
+    group_order = random_permutations(rng, count, groups)
+    inner_order = rng.random((count, groups, group_size)).argsort(axis=2)
+    inner_order = np.take_along_axis(inner_order, group_order[:, :, None], axis=1)
+    return (group_order[:, :, None] * group_size + inner_order).reshape(count, groups * group_size)
+
+
+def transform_grids(seeds, count, row_group_size=3, column_group_size=3, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    seeds = np.asarray(seeds, dtype=np.uint8).reshape(-1, row_group_size * column_group_size,
+                                                      row_group_size * column_group_size)
+    size = seeds.shape[1]
+    grids = seeds[rng.integers(0, len(seeds), size=count)]
+
+    labels = np.zeros((count, size + 1), dtype=np.uint8)
+    labels[:, 1:] = random_permutations(rng, count, size) + 1
+    grids = np.take_along_axis(labels, grids.reshape(count, -1).astype(np.intp), axis=1).reshape(count, size, size)
+
+    rows = line_order(rng, count, size // row_group_size, row_group_size)
+    grids = np.take_along_axis(grids, rows[:, :, None], axis=1)
+    columns = line_order(rng, count, size // column_group_size, column_group_size)
+    grids = np.take_along_axis(grids, columns[:, None, :], axis=2)
+
+    # Transposing keeps the box shape only when boxes are square
+    if row_group_size == column_group_size:
+        transpose = rng.random(count) < 0.5
+        grids[transpose] = grids[transpose].transpose(0, 2, 1)
+    return grids
+
+
+class GridFactory:
+
+    def __init__(self, row_group_size=3, column_group_size=3, seeds=None, seed_count=8, batch_size=1024, rng=None):
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.seed_count = seed_count
+        self.batch_size = batch_size
+        self.seeds = None if seeds is None else np.asarray(seeds, dtype=np.uint8)
+        self.buffer = []
+
+    def prepare_seeds(self):
+        generator = Generator(self.row_group_size, self.column_group_size)
+        seeds = [pattern_grid(self.row_group_size, self.column_group_size)]
+        seeds += [generator.generate_grid() for _ in range(self.seed_count - 1)]
+        self.seeds = np.array(seeds, dtype=np.uint8)
+
+    def generate(self, count):
+        if self.seeds is None:
+            self.prepare_seeds()
+        return transform_grids(self.seeds, count, self.row_group_size, self.column_group_size, self.rng)
+
+    def next_grid(self):
+        if not self.buffer:
+            self.buffer = list(self.generate(self.batch_size))
+        return self.buffer.pop().astype(int)
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def to_boxes(grids, row_group_size, column_group_size):
+    count, size = grids.shape[0], grids.shape[1]
+    # Same cells as Checker.get_group, one box per row of the result
+    return grids.reshape(count, size // row_group_size, row_group_size, size // column_group_size, column_group_size) \
+        .transpose(0, 1, 3, 2, 4).reshape(count, size, size)
+
+
+def from_boxes(boxes, row_group_size, column_group_size):
+    count, size = boxes.shape[0], boxes.shape[1]
+    return boxes.reshape(count, size // row_group_size, size // column_group_size, row_group_size, column_group_size) \
+        .transpose(0, 1, 3, 2, 4).reshape(count, size, size)
+
+
+def duplicate_cells(units):
+    # Units are the last axis; a cell is a duplicate when its digit repeats within its unit
+    ordered = np.sort(units, axis=2)
+    repeated = (ordered[..., 1:] == ordered[..., :-1]) & (ordered[..., 1:] != 0)
+    repeated_bits = np.bitwise_or.reduce(np.where(repeated, np.left_shift(1, ordered[..., 1:]), 0), axis=2)
+    return (np.left_shift(1, units) & repeated_bits[..., None] != 0) & (units != 0)
+
+
+def find_conflicts(grids, row_group_size=3, column_group_size=3):
+    grids = np.asarray(grids, dtype=np.int64)
+    conflicts = duplicate_cells(grids)
+    conflicts |= duplicate_cells(grids.transpose(0, 2, 1)).transpose(0, 2, 1)
+    conflicts |= from_boxes(duplicate_cells(to_boxes(grids, row_group_size, column_group_size)),
+                            row_group_size, column_group_size)
+    return conflicts
+
+
+def validate_grids(grids, row_group_size=3, column_group_size=3, chunk_size=65536):
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[None]
+    size = row_group_size * column_group_size
+    if grids.shape[1:] != (size, size):
+        raise ValueError("Expected grids of shape (N, {0}, {0}), got {1}".format(size, grids.shape))
+
+    valid = np.empty(len(grids), dtype=bool)
+    conflicts = np.empty(grids.shape, dtype=bool)
+    for start in range(0, len(grids), chunk_size):
+        chunk = np.asarray(grids[start:start + chunk_size], dtype=np.int64)
+        out_of_range = (chunk < 0) | (chunk > size)
+        chunk_conflicts = find_conflicts(np.where(out_of_range, 0, chunk), row_group_size, column_group_size)
+        chunk_conflicts |= out_of_range
+        conflicts[start:start + chunk_size] = chunk_conflicts
+        valid[start:start + chunk_size] = ~(chunk_conflicts | (chunk == 0)).reshape(len(chunk), -1).any(axis=1)
+    return valid, conflicts
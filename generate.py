@@ -0,0 +1,77 @@
+import argparse
+import sys
+import time
+from multiprocessing import Pool
+
+from engine.generator import Generator
+from engine.puzzle_bank import PuzzleBankWriter, measure_nodes
+from engine.puzzle_format import format_puzzle, parse_box_size
+from engine.transforms import GridFactory
+
+generator = None
+
+
+def init_worker(row_group_size, column_group_size, symmetry, target_clues, test_budget):
+    global generator
+    grid_factory = GridFactory(row_group_size, column_group_size)
+    generator = Generator(row_group_size, column_group_size, grid_factory=grid_factory, mode=Generator.DIGGING,
+                          symmetry=symmetry, target_clues=target_clues, test_budget=test_budget)
+
+
+def generate_one(_):
+    puzzle = generator.generate_puzzle()
+    _, solution, nodes = measure_nodes(generator.solver, puzzle)
+    return puzzle, solution, nodes, generator.last_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate unique puzzles by digging holes into complete grids.")
+    parser.add_argument('count', type=int, help="number of puzzles")
+    parser.add_argument('-o', '--output', default='-', help="puzzle file, '-' for stdout")
+    parser.add_argument('-b', '--bank', default=None, help="write a binary puzzle bank instead of text")
+    parser.add_argument('-j', '--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('-s', '--symmetry', default=Generator.NO_SYMMETRY,
+                        choices=[Generator.NO_SYMMETRY, Generator.ROTATIONAL, Generator.MIRROR])
+    parser.add_argument('-t', '--target-clues', type=int, default=None, help="stop digging at this many clues")
+    parser.add_argument('-n', '--test-budget', type=int, default=None,
+                        help="search nodes per uniqueness test, clues stay when it runs out")
+    parser.add_argument('--box', type=parse_box_size, default=(3, 3), help="box size as RxC (default: 3x3)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="report clues and time of every puzzle")
+    args = parser.parse_args(argv)
+
+    if args.bank is not None:
+        bank = PuzzleBankWriter(args.bank, *args.box)
+        target = None
+    else:
+        bank = None
+        target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    clues, generation_time = [], 0.0
+    start = time.perf_counter()
+    try:
+        with Pool(args.processes, initializer=init_worker,
+                  initargs=(*args.box, args.symmetry, args.target_clues, args.test_budget)) as pool:
+            for puzzle, solution, nodes, report in pool.imap(generate_one, range(args.count), chunksize=4):
+                if bank is not None:
+                    bank.add(puzzle, solution, nodes, report['time'])
+                else:
+                    target.write(format_puzzle(puzzle) + '\n')
+                clues.append(report['clues'])
+                generation_time += report['time']
+                if args.verbose:
+                    print("{} clues, {} nodes in {:.1f} ms".format(report['clues'], nodes, report['time'] * 1000),
+                          file=sys.stderr)
+    finally:
+        if bank is not None:
+            bank.close()
+        elif target is not sys.stdout:
+            target.close()
+
+    elapsed = time.perf_counter() - start
+    if clues:
+        print("{} puzzles in {:.2f} s, {:.1f} ms per puzzle, clues: mean {:.1f}, min {}, max {}".format(
+            len(clues), elapsed, generation_time / len(clues) * 1000, sum(clues) / len(clues), min(clues),
+            max(clues)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
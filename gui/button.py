@@ -21,6 +21,9 @@ class Button:
         self.cover_color = cover_color
         self.current_color = color
 
+        self.label = self.font.render(self.text, True, self.text_color)
+        self.dirty = True
+
         self.on_click = lambda: None
 
         parent.add_observer(self)
@@ -32,13 +35,20 @@ class Button:
     def get_size(self):
         return [dim + 2 * self.padding for dim in self.font.size(self.text)]
 
+    def get_rect(self):
+        return pygame.Rect(self.position, (self.button_width, self.button_height))
+
     def draw(self):
-        pygame.draw.rect(self.surface, self.current_color,
-                         pygame.Rect(self.position, (self.button_width, self.button_height)))
-        text = self.font.render(self.text, True, self.text_color)
-        text_rect = text.get_rect(center=(self.position[0] + self.button_width / 2,
-                                          self.position[1] + self.button_height / 2))
-        self.surface.blit(text, text_rect)
+        pygame.draw.rect(self.surface, self.current_color, self.get_rect())
+        text_rect = self.label.get_rect(center=(self.position[0] + self.button_width / 2,
+                                                self.position[1] + self.button_height / 2))
+        self.surface.blit(self.label, text_rect)
+        self.dirty = False
+
+    def set_color(self, color):
+        if color != self.current_color:
+            self.current_color = color
+            self.dirty = True
 
     def is_mouse_over(self, mouse_position):
         if 0 < mouse_position[0] - self.position[0] < self.button_width:
@@ -49,9 +59,9 @@ class Button:
     def process_event(self, event, mouse_position):
         if event.type == pygame.MOUSEMOTION:
             if self.is_mouse_over(mouse_position):
-                self.current_color = self.cover_color
+                self.set_color(self.cover_color)
             else:
-                self.current_color = self.color
+                self.set_color(self.color)
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.is_mouse_over(mouse_position):
                 self.on_click()
@@ -1,14 +1,20 @@
-from collections import Counter
-from random import randrange, choice, shuffle
-
 import pygame
 
+from engine.checker import Checker
+from engine.generator import Generator
+from engine.occupancy import Occupancy
+from engine.parallel import ParallelSolver
+from engine.puzzle_bank import LEVELS, PuzzleBank
+from engine.puzzle_pool import PuzzlePool
+from engine.search_stats import SearchStats
+from engine.solution_cache import SolutionCache
+from engine.solver import Solver
 from gui.button import Button
-import threading
 import time
 import numpy as np
 
 from gui.layout import Layout
+from gui.task_executor import TaskExecutor
 
 
 class SudokuBoard:
@@ -16,32 +22,36 @@ class SudokuBoard:
     ACCEPTED = 1
     WRONG = -1
 
-    def __init__(self):
-        self.done = False
-        self.remove_attempts = 5
+    BUTTON_TEXTS = ("New puzzle", "Hint", "Check", "Solve", "Clean")
 
-        self.cells_in_row = 9
-        self.row_group_size = 3
+    def __init__(self, row_group_size=3, column_group_size=3, frame_rate=60, idle_timeout=100, live_validation=False,
+                 cache_path=None, bank_path=None, bank_difficulty=(0, LEVELS - 1), debug_overlay=False,
+                 solve_processes=None):
+        self.done = False
 
-        self.cells_in_column = 9
-        self.column_group_size = 3
+        self.row_group_size = row_group_size
+        self.column_group_size = column_group_size
+        self.cells_in_row = row_group_size * column_group_size
+        self.cells_in_column = self.cells_in_row
 
-        self.groups_in_row = int(self.cells_in_row / self.row_group_size)
-        self.groups_in_column = int(self.cells_in_column / self.column_group_size)
+        # Cells shrink on large boards to keep the window on screen
+        self.cell_width = max(24, min(40, 480 // self.cells_in_row))
+        self.cell_height = self.cell_width
 
         pygame.font.init()
-        self.font = pygame.font.SysFont("cambriacambriamath", 30)
+        self.font = pygame.font.SysFont("cambriacambriamath", self.cell_height * 3 // 4)
         self.button_font = pygame.font.SysFont("cambriacambriamath", 19)
         self.info_font = pygame.font.SysFont("cambriacambriamath", 45, bold=True)
+        self.stats_font = pygame.font.SysFont("couriernew", 14)
 
-        self.cell_width = 40
-        self.cell_height = 40
         self.margin = 10
         self.button_height = Button.check_size('', self.button_font)[1]
+        buttons_width = sum(Button.check_size(text, self.button_font)[0] + Layout.DEFAULT_PADDING
+                            for text in SudokuBoard.BUTTON_TEXTS)
 
         self.grid_width = self.cell_width * self.cells_in_row + 2 * self.margin
         self.grid_height = self.cell_height * self.cells_in_column + 2 * self.margin
-        self.window_width = self.grid_width
+        self.window_width = max(self.grid_width, buttons_width + 2 * self.margin)
         self.window_height = self.grid_height + self.button_height + 1 * self.margin
 
         self.screen = pygame.display.set_mode((self.window_width, self.window_height))
@@ -53,9 +63,22 @@ class SudokuBoard:
         self.wrong_value_color = (181, 20, 20)
         self.info_color = (0, 0, 0)
         self.highlight_color = (174, 237, 111)
+        self.background_color = (255, 255, 255)
+
+        # Frames per second, 0 for uncapped; idle_timeout in ms, None to keep polling when nothing changes
+        self.frame_rate = frame_rate
+        self.idle_timeout = idle_timeout
+        self.clock = pygame.time.Clock()
+        self.glyphs = self.render_glyphs()
+        self.info_glyphs = {}
+        self.drawn_state = None
 
         self.selected_row = 0
         self.selected_column = 0
+        # Digits typed so far for values above 9, committed on Enter, timeout or when no further digit fits
+        self.input_buffer = ''
+        self.input_started = None
+        self.input_timeout = 1.0
 
         self.navigation_keys = {
             pygame.K_LEFT: (-1, 0),
@@ -66,20 +89,48 @@ class SudokuBoard:
 
         self.grid = np.zeros(shape=(self.cells_in_row, self.cells_in_column), dtype=int)
         self.grid_status = np.full(shape=(self.cells_in_row, self.cells_in_column), fill_value=SudokuBoard.ACCEPTED)
-
-        self.elements_set = set([i for i in range(1, self.row_group_size * self.column_group_size + 1)])
+        self.occupancy = Occupancy(self.grid, self.row_group_size, self.column_group_size)
+        # Mark conflicting values while typing instead of waiting for a hint
+        self.live_validation = live_validation
+
+        self.checker = Checker(self.row_group_size, self.column_group_size)
+        # Hard puzzles and large boards can split the search over several processes
+        self.solve_processes = solve_processes
+        if solve_processes is None:
+            self.solver = Solver(self.row_group_size, self.column_group_size)
+        else:
+            self.solver = ParallelSolver(self.row_group_size, self.column_group_size, processes=solve_processes)
+        self.solution_cache = SolutionCache(self.row_group_size, self.column_group_size, path=cache_path)
+        # Uniqueness tests on large boards are bounded so a new puzzle still takes seconds
+        test_budget = None if self.cells_in_row <= 9 else 20
+        self.puzzle_pool = PuzzlePool(self.row_group_size, self.column_group_size, mode=Generator.DIGGING,
+                                      symmetry=Generator.ROTATIONAL, test_budget=test_budget)
+        # A prebuilt puzzle bank replaces generation when given
+        self.puzzle_bank = None if bank_path is None else PuzzleBank(bank_path)
+        # 2x3 and 3x2 boxes both make 6x6 boards, so the box shape has to match, not only the size
+        bank = self.puzzle_bank
+        if bank is not None and (bank.row_group_size, bank.column_group_size) != (row_group_size, column_group_size):
+            raise ValueError("Puzzle bank holds puzzles for {}x{} boxes".format(bank.row_group_size,
+                                                                               bank.column_group_size))
+        # Range of difficulty levels new puzzles are drawn from
+        self.bank_difficulty = bank_difficulty
+
+        self.executor = TaskExecutor()
+        self.solve_timeout = 10
+        self.caption = None
 
         self.observers = []
-        self.puzzle_button = Button(parent=self, surface=self.screen, text="New puzzle", font=self.button_font)
-        self.puzzle_button.set_on_click_event(lambda: threading.Thread(target=self.generate_puzzle).start())
-        self.hint_button = Button(parent=self, surface=self.screen, text="Hint", font=self.button_font)
-        self.hint_button.set_on_click_event(lambda: threading.Thread(target=self.hint).start())
-        self.check_button = Button(parent=self, surface=self.screen, text="Check", font=self.button_font)
+        puzzle_text, hint_text, check_text, solve_text, clean_text = SudokuBoard.BUTTON_TEXTS
+        self.puzzle_button = Button(parent=self, surface=self.screen, text=puzzle_text, font=self.button_font)
+        self.puzzle_button.set_on_click_event(self.new_puzzle)
+        self.hint_button = Button(parent=self, surface=self.screen, text=hint_text, font=self.button_font)
+        self.hint_button.set_on_click_event(self.hint)
+        self.check_button = Button(parent=self, surface=self.screen, text=check_text, font=self.button_font)
         self.check_button.set_on_click_event(self.check_and_display_info)
-        self.solve_button = Button(parent=self, surface=self.screen, text="Solve", font=self.button_font)
-        self.solve_button.set_on_click_event(lambda: threading.Thread(target=self.solve).start())
-        self.clean_button = Button(parent=self, surface=self.screen, text="Clean", font=self.button_font)
-        self.clean_button.set_on_click_event(lambda: threading.Thread(target=self.clean).start())
+        self.solve_button = Button(parent=self, surface=self.screen, text=solve_text, font=self.button_font)
+        self.solve_button.set_on_click_event(self.solve)
+        self.clean_button = Button(parent=self, surface=self.screen, text=clean_text, font=self.button_font)
+        self.clean_button.set_on_click_event(self.clean)
 
         self.buttons_layout = Layout(start=(self.margin, self.grid_height),
                                      max_size=self.window_width - 2 * self.margin)
@@ -90,18 +141,46 @@ class SudokuBoard:
         self.buttons_layout.add_element(self.clean_button)
 
         self.info = None
+        self.info_message = None
+        self.info_started = None
+
+        # Stats of the last solve or generation, toggled with F3
+        self.debug_overlay = debug_overlay
+        self.last_operation = None
+        self.stats_surface = None
 
     def clean(self):
-        self.grid = np.zeros(shape=(self.cells_in_row, self.cells_in_column), dtype=int)
+        self.executor.cancel('solve')
+        self.executor.cancel('puzzle')
+        self.reset_grid()
+
+    def reset_grid(self):
+        self.set_grid(np.zeros(shape=(self.cells_in_row, self.cells_in_column), dtype=int))
         self.grid_status = np.full(shape=(self.cells_in_row, self.cells_in_column), fill_value=SudokuBoard.ACCEPTED)
 
+    def set_grid(self, grid):
+        self.occupancy.load(grid)
+        self.grid = grid
+
+    def set_value(self, row, column, value):
+        # A running solve works on the previous grid
+        self.executor.cancel('solve')
+        self.grid[row][column] = value
+        self.grid_status[row][column] = SudokuBoard.INPUT
+        affected = self.occupancy.set(row, column, value)
+        if self.live_validation:
+            for i, j in affected:
+                if self.grid_status[i][j] != SudokuBoard.ACCEPTED:
+                    wrong = self.occupancy.is_conflicting(i, j)
+                    self.grid_status[i][j] = SudokuBoard.WRONG if wrong else SudokuBoard.INPUT
+
     def add_observer(self, observer):
         self.observers.append(observer)
 
     def quit(self):
         self.done = True
 
-    def draw_lines(self, number_of_lines, step, horizontal):
+    def draw_lines(self, number_of_lines, step, group_size, horizontal):
         for i in range(number_of_lines):
             current_position = i * step + self.margin
             start = self.margin
@@ -119,15 +198,22 @@ class SudokuBoard:
                              color=self.line_color,
                              start_pos=start_pos,
                              end_pos=end_pos,
-                             width=(2 if i % 3 == 0 else 1))
+                             width=(2 if i % group_size == 0 else 1))
+
+    def status_color(self, status):
+        if status == SudokuBoard.WRONG:
+            return self.wrong_value_color
+        if status == SudokuBoard.ACCEPTED:
+            return self.accepted_value_color
+        return self.input_value_color
+
+    def render_glyphs(self):
+        return {(value, status): self.font.render(str(value), True, self.status_color(status))
+                for value in range(1, self.row_group_size * self.column_group_size + 1)
+                for status in (SudokuBoard.INPUT, SudokuBoard.ACCEPTED, SudokuBoard.WRONG)}
 
     def draw_value(self, value, row, column):
-        color = self.input_value_color
-        if self.grid_status[row][column] == SudokuBoard.WRONG:
-            color = self.wrong_value_color
-        if self.grid_status[row][column] == SudokuBoard.ACCEPTED:
-            color = self.accepted_value_color
-        text = self.font.render(str(value), True, color)
+        text = self.glyphs[(int(value), int(self.grid_status[row][column]))]
         text_rect = text.get_rect(center=((column * self.cell_width) + self.margin + self.cell_width / 2,
                                           (row * self.cell_height) + self.margin + self.cell_height / 2,))
         self.screen.blit(text, text_rect)
@@ -138,18 +224,30 @@ class SudokuBoard:
                 if self.grid[i][j] != 0:
                     self.draw_value(self.grid[i][j], i, j)
 
+    def cell_rect(self, row, column):
+        line_fix_row = 2 if row % self.row_group_size == 0 else 1
+        line_fix_column = 2 if column % self.column_group_size == 0 else 1
+        return pygame.Rect(self.margin + column * self.cell_width + line_fix_column,
+                           self.margin + row * self.cell_height + line_fix_row,
+                           self.cell_width - line_fix_column,
+                           self.cell_height - line_fix_row)
+
     def highlight_cell(self):
         if self.selected_row is None or self.selected_column is None:
             return
-        line_fix_row = 2 if self.selected_row % self.row_group_size == 0 else 1
-        line_fix_column = 2 if self.selected_column % self.column_group_size == 0 else 1
         pygame.draw.rect(surface=self.screen,
                          color=self.highlight_color,
-                         rect=pygame.Rect(self.margin + self.selected_row * self.cell_width + line_fix_row,
-                                          self.margin + self.selected_column * self.cell_height + line_fix_column,
-                                          self.cell_width - line_fix_row,
-                                          self.cell_height - line_fix_column)
-                         )
+                         rect=self.cell_rect(self.selected_column, self.selected_row))
+
+    def draw_cell(self, row, column):
+        rect = self.cell_rect(row, column)
+        selected = (row, column) == (self.selected_column, self.selected_row)
+        pygame.draw.rect(surface=self.screen,
+                         color=self.highlight_color if selected else self.background_color,
+                         rect=rect)
+        if self.grid[row][column] != 0:
+            self.draw_value(self.grid[row][column], row, column)
+        return rect
 
     @staticmethod
     def check_limitations(new_value, minimum, maximum):
@@ -160,13 +258,14 @@ class SudokuBoard:
         return True
 
     def get_cell_pos(self, pos):
-        cell_x = (pos[0] - self.margin) // (self.cell_width + 1)
-        cell_y = (pos[1] - self.margin) // (self.cell_height + 1)
+        cell_x = (pos[0] - self.margin) // self.cell_width
+        cell_y = (pos[1] - self.margin) // self.cell_height
         return cell_x, cell_y
 
     def update_selected_cell(self, cell_x, cell_y):
         if SudokuBoard.check_limitations(cell_x, 0, self.cells_in_row - 1):
             if SudokuBoard.check_limitations(cell_y, 0, self.cells_in_column - 1):
+                self.commit_input()
                 self.selected_row = cell_x
                 self.selected_column = cell_y
 
@@ -178,221 +277,231 @@ class SudokuBoard:
             self.update_selected_cell(self.selected_row + self.navigation_keys[key][0],
                                       self.selected_column + self.navigation_keys[key][1])
         elif key is pygame.K_BACKSPACE:
-            self.grid[self.selected_column][self.selected_row] = 0
-            self.grid_status[self.selected_column][self.selected_row] = SudokuBoard.INPUT
+            self.input_buffer = ''
+            self.set_value(self.selected_column, self.selected_row, 0)
+        elif key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.commit_input()
+        elif key == pygame.K_F3:
+            self.debug_overlay = not self.debug_overlay
         else:
             s = pygame.key.name(key)
             s = s.replace('[', '')
             s = s.replace(']', '')
-            if s.isdigit() and int(s) != 0:
-                self.grid[self.selected_column][self.selected_row] = int(s)
-                self.grid_status[self.selected_column][self.selected_row] = SudokuBoard.INPUT
+            if s.isdigit():
+                self.type_digit(s)
+
+    def type_digit(self, digit):
+        value = int(self.input_buffer + digit)
+        if value == 0 or value > self.cells_in_row:
+            # Start over with the new digit when it does not extend the typed value
+            self.input_buffer = ''
+            value = int(digit)
+            if value == 0 or value > self.cells_in_row:
+                return
+        self.input_buffer = str(value)
+        self.input_started = time.monotonic()
+        self.set_value(self.selected_column, self.selected_row, value)
+        if value * 10 > self.cells_in_row:
+            self.commit_input()
+
+    def commit_input(self):
+        self.input_buffer = ''
+        self.input_started = None
+
+    def update_input(self):
+        if self.input_started is not None and time.monotonic() - self.input_started > self.input_timeout:
+            self.commit_input()
 
     def draw_info(self):
         if self.info is None:
             return
         info_text = self.info.split('\n')
         for i, text in enumerate(info_text):
-            info = self.info_font.render(text, True, self.info_color)
+            if (text, self.info_color) not in self.info_glyphs:
+                self.info_glyphs[(text, self.info_color)] = self.info_font.render(text, True, self.info_color)
+            info = self.info_glyphs[(text, self.info_color)]
             into_text_rect = info.get_rect(center=(self.grid_width / 2, self.grid_height / 2
                                                    + info.get_size()[1] * i - info.get_size()[1] * len(info_text) / 2))
             self.screen.blit(info, into_text_rect)
 
+    def record_stats(self, operation, stats, note=None):
+        self.last_operation = (operation, stats, note)
+        self.stats_surface = None
+
+    def draw_stats(self):
+        if not self.debug_overlay or self.last_operation is None:
+            return
+        if self.stats_surface is None:
+            operation, stats, note = self.last_operation
+            lines = [operation if note is None else "{} ({})".format(operation, note)]
+            if stats is not None:
+                lines += SearchStats.describe(stats)
+            glyphs = [self.stats_font.render(line, True, self.line_color) for line in lines]
+            line_height = self.stats_font.get_linesize()
+            self.stats_surface = pygame.Surface((max(glyph.get_width() for glyph in glyphs) + 8,
+                                                 line_height * len(glyphs) + 8), pygame.SRCALPHA)
+            self.stats_surface.fill((255, 255, 255, 220))
+            for i, glyph in enumerate(glyphs):
+                self.stats_surface.blit(glyph, (4, 4 + i * line_height))
+        self.screen.blit(self.stats_surface, (self.margin + 2, self.margin + 2))
+
     def draw(self):
-        self.draw_lines(self.cells_in_row + 1, self.cell_width, False)
-        self.draw_lines(self.cells_in_column + 1, self.cell_height, True)
+        self.screen.fill(self.background_color)
+        self.draw_lines(self.cells_in_row + 1, self.cell_width, self.column_group_size, False)
+        self.draw_lines(self.cells_in_column + 1, self.cell_height, self.row_group_size, True)
         self.highlight_cell()
         self.draw_values()
         self.buttons_layout.draw()
+        self.draw_stats()
         self.draw_info()
 
-    def animate_and_hide_info(self):
-        text = self.info
-        for i in range(10):
-            time.sleep(0.1)
-            if i % 2 == 0:
-                self.info = text
+    def render(self):
+        grid, grid_status = self.grid, self.grid_status
+        selection = (self.selected_column, self.selected_row)
+        info = (self.info, self.info_color)
+        overlay = (self.debug_overlay, self.last_operation)
+        if self.drawn_state is None or info != self.drawn_state[3] or overlay != self.drawn_state[4]:
+            self.draw()
+            rects = [self.screen.get_rect()]
+        else:
+            drawn_grid, drawn_status, drawn_selection, _, _ = self.drawn_state
+            modified = (grid != drawn_grid) | (grid_status != drawn_status)
+            changed = {(int(i), int(j)) for i, j in zip(*np.nonzero(modified))}
+            if selection != drawn_selection:
+                changed.update((drawn_selection, selection))
+            dirty_buttons = [button for button in self.buttons_layout.elements if button.dirty]
+            if (self.info is not None or self.debug_overlay and self.last_operation is not None) \
+                    and (changed or dirty_buttons):
+                # The message and the stats overlap cells, so they have to be drawn again on top of everything
+                self.draw()
+                rects = [self.screen.get_rect()]
             else:
-                self.info = None
+                rects = [self.draw_cell(i, j) for i, j in changed]
+                for button in dirty_buttons:
+                    button.draw()
+                    rects.append(button.get_rect())
+        self.drawn_state = (grid.copy(), grid_status.copy(), selection, info, overlay)
+        return rects
+
+    def wait_for_events(self, idle):
+        if not idle:
+            return pygame.event.get()
+        event = pygame.event.wait(self.idle_timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def update_info(self):
+        if self.info_message is None:
+            return
+        # Blink in 0.1 s steps for one second, then hide
+        step = int((time.monotonic() - self.info_started) / 0.1)
+        if step >= 10:
+            self.info_message = None
+            self.info = None
+        else:
+            self.info = self.info_message if step == 0 or step % 2 == 1 else None
 
     def display_info(self, message, positive=True):
         self.info = message
+        self.info_message = message
+        self.info_started = time.monotonic()
         self.info_color = (22, 112, 4) if positive else (186, 0, 0)
-        threading.Thread(target=self.animate_and_hide_info).start()
+
+    def update_caption(self):
+        caption = "Sudoku"
+        for action in ('solve', 'puzzle'):
+            status = self.executor.status(action)
+            if status is not None:
+                caption += " - {} {:.1f} s, {} nodes".format(action, status['elapsed'], status['progress'])
+        if caption != self.caption:
+            pygame.display.set_caption(caption)
+            self.caption = caption
 
     def check_and_display_info(self):
         correct = self.check()
         self.display_info("Correct" if correct else "Incorrect!", correct)
 
-    def is_iterable_valid(self, iter_obj):
-        return set(iter_obj) == self.elements_set
-
-    def are_rows_valid(self, grid):
-        return not any(not self.is_iterable_valid(row) for row in grid)
-
-    def get_group(self, array, group_x_number, group_y_number):
-        r_s = group_x_number * self.row_group_size
-        c_s = group_y_number * self.column_group_size
-        return array[r_s:r_s + self.row_group_size, c_s:c_s + self.column_group_size] \
-            .reshape(self.row_group_size * self.column_group_size)
-
-    def are_groups_valid(self):
-        return not any(not self.is_iterable_valid(self.get_group(self.grid, i, j)) for i in range(self.groups_in_row)
-                       for j in range(self.groups_in_column))
-
-    @staticmethod
-    def get_wrong(line):
-        c = Counter(line)
-        for key in c:
-            if c[key] > 1:
-                for i, cell in enumerate(line):
-                    if cell == key:
-                        yield i
-
     def hint(self):
-        for i, row in enumerate(self.grid):
-            for j in SudokuBoard.get_wrong(row):
-                if self.grid_status[i][j] != SudokuBoard.ACCEPTED:
-                    self.grid_status[i][j] = SudokuBoard.WRONG
-        for j in range(self.cells_in_column):
-            column = self.grid[:, j]
-            for i in SudokuBoard.get_wrong(column):
-                if self.grid_status[i][j] != SudokuBoard.ACCEPTED:
-                    self.grid_status[i][j] = SudokuBoard.WRONG
+        for i, j in self.occupancy.conflicts():
+            if self.grid_status[i][j] != SudokuBoard.ACCEPTED:
+                self.grid_status[i][j] = SudokuBoard.WRONG
 
     def check(self):
-        rows_correct = self.are_rows_valid(self.grid)
-        columns_correct = self.are_rows_valid(np.rot90(self.grid))
-        groups_correct = self.are_groups_valid()
-        return rows_correct and columns_correct and groups_correct
-
-    @staticmethod
-    def modify_values_in_line(value, line, modify_function):
-        for i, element in enumerate(line):
-            if value in element:
-                modify_function(element, value)
-                # element.remove(value)
-
-    def modify_candidate_values(self, grid, candidate_values, cell_x, cell_y, modify_function):
-        value = grid[cell_x][cell_y]
-
-        self.modify_values_in_line(value, candidate_values[cell_x], modify_function)
-        self.modify_values_in_line(value, candidate_values[:, cell_y], modify_function)
-
-        group_x, group_y = cell_x // self.row_group_size, cell_y // self.column_group_size
-        self.modify_values_in_line(value, self.get_group(candidate_values, group_x, group_y), modify_function)
-
-    def get_empty_cell(self, grid, candidate_values):
-        minimum = len(self.elements_set)
-        x, y = -1, -1
-        for i in range(self.cells_in_row):
-            for j in range(self.cells_in_column):
-                if grid[i][j] == 0 and len(candidate_values[i][j]) < minimum:
-                    minimum = len(candidate_values[i][j])
-                    x, y = i, j
-                    if minimum == 1:
-                        return x, y
-        return x, y
-
-    def prepare_run(self, values, candidate_values, option, x, y):
-        # v = values.copy()
-        # c_v = candidate_values.copy()
-        values[x][y] = option
-        self.modify_candidate_values(values, candidate_values, x, y, lambda s, v: s.remove(v))
-        return self.run_solver(values, self.prepare_candidate_values(values))
-
-    def run_solver(self, values, candidate_values):
-        # Solved
-        if not any(0 in row for row in values):
-            yield values
-        # Choose empty cell with fewest candidate values
-        x, y = self.get_empty_cell(values, candidate_values)
-        options = candidate_values[x][y]
-        # Unsolvable
-        if len(options) == 0:
-            yield None
-        else:
-            options_list = list(options)
-            shuffle(options_list)
-            for option in options_list:
-                values[x][y] = option
-                self.modify_candidate_values(values, candidate_values, x, y, lambda s, v: s.remove(v))
-                yield from self.run_solver(values, self.prepare_candidate_values(values))
-                values[x][y] = 0
-                self.modify_candidate_values(values, candidate_values, x, y, lambda s, v: s.add(v))
-
-    def prepare_candidate_values(self, grid):
-        candidate_values = np.array([[self.elements_set.copy() if grid[i][j] == 0 else {grid[i][j]}
-                                      for j in range(self.cells_in_row)] for i in range(self.cells_in_column)])
-
-        for i in range(self.cells_in_row):
-            for j in range(self.cells_in_column):
-                if grid[i][j] != 0:
-                    self.modify_candidate_values(grid, candidate_values, i, j, lambda s, v: s.remove(v))
-        return candidate_values
+        return self.checker.check(self.grid)
 
     def solve(self):
-        if not any(0 in row for row in self.grid):
+        if self.occupancy.filled == self.cells_in_row * self.cells_in_column:
             self.display_info('Solved!', positive=True)
             return
 
-        if np.count_nonzero(self.grid == 0) == self.cells_in_row * self.cells_in_column:
+        if self.occupancy.filled == 0:
             self.display_info('Enter values!', positive=False)
             return
 
         grid = self.grid.copy()
-        counter = 0
-        solution = None
-        for result in self.run_solver(grid, self.prepare_candidate_values(grid)):
-            if counter > 1:
-                self.display_info('Not uniquely\n solvable!', positive=False)
-                return
-            if result is not None:
-                counter += 1
-                solution = result.copy()
-        if solution is not None:
+        self.executor.submit('solve', lambda token: self.solve_grid(grid, token), on_done=self.show_solution,
+                             on_timeout=lambda: self.display_info('Timed out!', positive=False),
+                             on_error=lambda error: self.display_info('Failed!', positive=False),
+                             timeout=self.solve_timeout)
+
+    def solve_grid(self, grid, token):
+        # Stats of this solve only, the solver's last_stats may already belong to a newer one
+        stats = SearchStats(self.solver.hooks)
+        hits = self.solution_cache.hits
+        status, solution = self.solution_cache.solve(self.solver, grid, token, stats)
+        # Cache hits never reach the solver
+        return status, solution, None if self.solution_cache.hits > hits else stats.as_dict()
+
+    def show_solution(self, result):
+        status, solution, stats = result
+        self.record_stats('Solve', stats, 'cached' if stats is None else None)
+        if status == Solver.NOT_UNIQUE:
+            self.display_info('Not uniquely\n solvable!', positive=False)
+            return
+        if status == Solver.SOLVED:
             self.display_info('Solved!', positive=True)
-            self.grid = solution
+            self.set_grid(solution)
             return
         self.display_info('Unsolvable!', positive=False)
 
-    def generate_grid(self):
-        self.clean()
-        grid = self.grid.copy()
-        candidate_values = self.prepare_candidate_values(grid)
-        for _ in range(10):
-            row_random, column_random = randrange(0, self.cells_in_row, 1), randrange(0, self.cells_in_column, 1)
-            grid[row_random][column_random] = choice(list(candidate_values[row_random][column_random]))
-            self.modify_candidate_values(grid, candidate_values, row_random, column_random, lambda s, v: s.remove(v))
-
-        for result in self.run_solver(grid, self.prepare_candidate_values(grid)):
-            if result is not None:
-                return result.copy()
-
-    def generate_puzzle(self):
-        grid = self.generate_grid()
-
-        remove = 0
-        while remove < self.remove_attempts:
-            row_random, column_random = randrange(0, self.cells_in_row, 1), randrange(0, self.cells_in_column, 1)
-            if grid[row_random][column_random] == 0:
-                continue
-            value = grid[row_random][column_random]
-            grid[row_random][column_random] = 0
-            counter = 0
-            for result in self.run_solver(grid.copy(), self.prepare_candidate_values(grid)):
-                if result is not None:
-                    counter += 1
-                if counter > 1:
-                    remove += 1
-                    grid[row_random][column_random] = value
-                    break
-        self.grid = grid
+    def new_puzzle(self):
+        if self.puzzle_bank is not None:
+            entry = self.puzzle_bank.random(*self.bank_difficulty)
+            if entry is not None:
+                self.record_stats('New puzzle', None, 'bank, {} nodes'.format(entry[2]['nodes']))
+                self.show_puzzle(entry[0])
+                return
+        puzzle = self.puzzle_pool.take()
+        if puzzle is None:
+            self.executor.submit('puzzle', self.puzzle_pool.get, on_done=self.show_generated_puzzle,
+                                 on_error=lambda error: self.display_info('Failed!', positive=False))
+            return
+        self.show_generated_puzzle(puzzle)
+
+    def show_generated_puzzle(self, puzzle):
+        self.record_stats('New puzzle', self.puzzle_pool.last_stats)
+        self.show_puzzle(puzzle)
+
+    def show_puzzle(self, puzzle):
+        # A fallback generation still running would replace this puzzle when it finishes
+        self.executor.cancel('puzzle')
+        self.executor.cancel('solve')
+        self.reset_grid()
+        self.set_grid(puzzle)
 
     def start(self):
+        self.puzzle_pool.start()
+        if self.solve_processes is not None:
+            # Fork the workers now, before solves run on executor threads
+            self.solver.get_pool()
+        idle = False
         while not self.done:
-            self.screen.fill((255, 255, 255))
-            for event in pygame.event.get():
+            self.executor.process_results()
+            self.update_info()
+            self.update_input()
+            self.update_caption()
+            for event in self.wait_for_events(idle):
                 if event.type == pygame.QUIT:
                     self.quit()
                 if event.type == pygame.KEYDOWN:
@@ -401,6 +510,15 @@ class SudokuBoard:
                     self.check_mouse_navigation()
                 for observer in self.observers:
                     observer.process_event(event, pygame.mouse.get_pos())
-            self.draw()
-            pygame.display.update()
+            rects = self.render()
+            if rects:
+                pygame.display.update(rects)
+            idle = self.idle_timeout is not None and not rects
+            self.clock.tick(self.frame_rate)
+        self.executor.cancel_all()
+        self.puzzle_pool.stop()
+        if self.solve_processes is not None:
+            self.solver.close()
+        if self.solution_cache.path is not None:
+            self.solution_cache.save()
         pygame.quit()
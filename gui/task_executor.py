@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+import traceback
+
+from engine.cancellation import CancelToken, Cancelled
+
+
+class Task:
+
+    def __init__(self, action, function, on_done, on_timeout, on_error, timeout):
+        self.action = action
+        self.function = function
+        self.on_done = on_done
+        self.on_timeout = on_timeout
+        self.on_error = on_error
+        self.token = CancelToken(timeout)
+        self.started = time.monotonic()
+        self.thread = None
+
+
+class TaskExecutor:
+
+    def __init__(self):
+        self.running = {}
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+
+    def submit(self, action, function, on_done=None, on_timeout=None, on_error=None, timeout=None):
+        # One job per action: a newer request replaces the one still in flight
+        task = Task(action, function, on_done, on_timeout, on_error, timeout)
+        with self.lock:
+            previous = self.running.get(action)
+            if previous is not None:
+                previous.token.cancel()
+            self.running[action] = task
+        task.thread = threading.Thread(target=self.run, args=(task,), daemon=True)
+        task.thread.start()
+        return task
+
+    def run(self, task):
+        try:
+            result = task.function(task.token)
+        except Cancelled:
+            if task.token.timed_out:
+                self.results.put((task, task.on_timeout, ()))
+            else:
+                self.results.put((task, None, ()))
+            return
+        except Exception as error:
+            # Still reported through the queue, so the task leaves the running set
+            traceback.print_exc()
+            self.results.put((task, task.on_error, (error,)))
+            return
+        self.results.put((task, task.on_done, (result,)))
+
+    def cancel(self, action):
+        with self.lock:
+            task = self.running.pop(action, None)
+        if task is not None:
+            task.token.cancel()
+
+    def cancel_all(self):
+        for action in list(self.running):
+            self.cancel(action)
+
+    def is_running(self, action):
+        return action in self.running
+
+    def status(self, action):
+        task = self.running.get(action)
+        if task is None:
+            return None
+        return {'elapsed': time.monotonic() - task.started, 'progress': task.token.progress}
+
+    def process_results(self):
+        # Called from the UI loop, so callbacks never race with drawing
+        while True:
+            try:
+                task, callback, args = self.results.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                current = self.running.get(task.action) is task
+                if current:
+                    del self.running[task.action]
+            if current and callback is not None:
+                callback(*args)